@@ -0,0 +1,45 @@
+import numpy as np
+import torch
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+def waveform_to_whisper_array(waveform, sample_rate: int):
+    """
+    将 AUDIO 波形 [channels, samples] 在内存中下混为单声道并重采样到 16 kHz，
+    返回 faster-whisper 可直接使用的 float32 numpy 数组。
+    """
+    if waveform.dim() == 1:
+        waveform = waveform.unsqueeze(0)
+    waveform = waveform.detach().to(device="cpu", dtype=torch.float32)
+    mono = waveform.mean(dim=0, keepdim=True) if waveform.shape[0] > 1 else waveform
+    if sample_rate != WHISPER_SAMPLE_RATE:
+        import torchaudio
+        mono = torchaudio.functional.resample(mono, sample_rate, WHISPER_SAMPLE_RATE)
+    return mono.squeeze(0).contiguous().numpy()
+
+
+def split_on_silence(audio, max_chunk_s: float = 300.0, search_s: float = 15.0, frame_ms: int = 30):
+    """
+    把长音频切成不超过 max_chunk_s 秒的窗口，切点选在每个窗口末尾 search_s 秒内能量最低的帧，
+    返回 [(start_sample, end_sample), ...]。
+    """
+    total = len(audio)
+    max_chunk = int(max_chunk_s * WHISPER_SAMPLE_RATE)
+    if total <= max_chunk:
+        return [(0, total)]
+
+    frame = max(int(WHISPER_SAMPLE_RATE * frame_ms / 1000), 1)
+    n_frames = total // frame
+    energy = np.sqrt(np.mean(np.square(audio[: n_frames * frame].reshape(n_frames, frame), dtype=np.float32), axis=1))
+    search = max(min(int(search_s * WHISPER_SAMPLE_RATE), max_chunk // 2), frame)
+
+    chunks, start = [], 0
+    while total - start > max_chunk:
+        lo = (start + max_chunk - search) // frame
+        hi = (start + max_chunk) // frame
+        split = (lo + int(np.argmin(energy[lo:hi]))) * frame + frame // 2 if hi > lo else start + max_chunk
+        chunks.append((start, split))
+        start = split
+    chunks.append((start, total))
+    return chunks
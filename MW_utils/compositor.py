@@ -0,0 +1,101 @@
+import bisect
+import math
+
+import numpy as np
+
+
+class SubtitleOverlay:
+    """
+    一个预先栅格化的字幕块：RGBA 位图 (未预乘)、左上角位置 (可超出画面) 和显示时间 [start, end)。
+    """
+
+    __slots__ = ("rgba", "x", "y", "start", "end")
+
+    def __init__(self, rgba, x, y, start, end):
+        self.rgba = rgba
+        self.x = int(x)
+        self.y = int(y)
+        self.start = start
+        self.end = end
+
+    @property
+    def width(self):
+        return self.rgba.shape[1]
+
+    @property
+    def height(self):
+        return self.rgba.shape[0]
+
+    def premultiplied(self, rows=slice(None), cols=slice(None)):
+        """返回裁剪区域的预乘颜色和 (255 - alpha)。不做缓存，可被多个线程同时调用。"""
+        rgba = self.rgba[rows, cols]
+        alpha = rgba[:, :, 3:4].astype(np.uint16)
+        return rgba[:, :, :3] * alpha, 255 - alpha
+
+    def __repr__(self):
+        return f"SubtitleOverlay({self.width}x{self.height} @ ({self.x}, {self.y}), {self.start:.3f}-{self.end:.3f}s)"
+
+
+def frame_span(start, end, fps, n_frames):
+    """返回满足 start <= i / fps < end 的帧序号区间 [first, last)，与按时间逐帧取样的结果一致。"""
+    def first_at_or_after(t):
+        i = min(max(int(math.ceil(t * fps)), 0), n_frames)
+        while i > 0 and (i - 1) / fps >= t:
+            i -= 1
+        while i < n_frames and i / fps < t:
+            i += 1
+        return i
+
+    first = first_at_or_after(start)
+    last = first_at_or_after(end) if end is not None else n_frames
+    return first, max(first, last)
+
+
+class OverlayTimeline:
+    """
+    字幕块的帧区间索引：一次性计算每个字幕块显示的帧区间 [f0, f1) 并按 f0 排序，
+    visible() 用 bisect 只取出与某段帧重叠的字幕块，每个窗口的开销与字幕块总数无关。
+    """
+
+    def __init__(self, overlays, fps, n_frames):
+        self.overlays = list(overlays)
+        spans = (frame_span(o.start, o.end, fps, n_frames) for o in self.overlays)
+        self.spans = sorted((f0, f1, i) for i, (f0, f1) in enumerate(spans) if f1 > f0)
+        self.starts = [f0 for f0, _, _ in self.spans]
+        self.max_length = max((f1 - f0 for f0, f1, _ in self.spans), default=0)
+
+    def visible(self, first, last):
+        """返回与帧区间 [first, last) 重叠的 [(overlay, f0, f1)]，保持 overlays 的原有顺序 (叠加顺序)。"""
+        # 起始帧早于 first - max_length + 1 的字幕块在 first 之前已经结束
+        lo = bisect.bisect_left(self.starts, first - self.max_length + 1)
+        hi = bisect.bisect_left(self.starts, last)
+        hits = sorted((i, f0, f1) for f0, f1, i in self.spans[lo:hi] if f1 > first)
+        return [(self.overlays[i], f0, f1) for i, f0, f1 in hits]
+
+
+def composite_overlays(frames, overlays, fps, first_frame=0):
+    """
+    把字幕位图按 [预乘颜色 + 背景 * (255 - alpha)] / 255 原地混合到 uint8 帧数组 frames [k, H, W, 3] 上。
+    frames 对应全局帧序号 first_frame 起的 k 帧；每个字幕块对其显示的整段帧区间一次性向量化混合，
+    位置超出画面的部分被裁掉。按 overlays 的顺序叠加，后面的在上层。
+    overlays 可以是字幕块列表，也可以是预先建好的 OverlayTimeline (逐窗口处理长视频时只建一次)。
+    """
+    n_local, frame_h, frame_w = frames.shape[:3]
+    if not isinstance(overlays, OverlayTimeline):
+        overlays = OverlayTimeline(overlays, fps, first_frame + n_local)
+    for overlay, f0, f1 in overlays.visible(first_frame, first_frame + n_local):
+        f0, f1 = max(f0 - first_frame, 0), min(f1 - first_frame, n_local)
+        x0, y0 = max(overlay.x, 0), max(overlay.y, 0)
+        x1, y1 = min(overlay.x + overlay.width, frame_w), min(overlay.y + overlay.height, frame_h)
+        if x1 <= x0 or y1 <= y0:
+            continue
+        premultiplied, inverse_alpha = overlay.premultiplied(
+            slice(y0 - overlay.y, y1 - overlay.y), slice(x0 - overlay.x, x1 - overlay.x)
+        )
+        region = frames[f0:f1, y0:y1, x0:x1]
+        blended = region * inverse_alpha
+        blended += premultiplied
+        blended += 127
+        blended //= 255
+        region[...] = blended
+    return frames
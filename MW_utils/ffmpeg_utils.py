@@ -0,0 +1,85 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import wave
+
+import numpy as np
+
+from .config import env_str
+
+
+def find_ffmpeg():
+    """依次查找 MW_ASR_FFMPEG 环境变量、系统 PATH 中的 ffmpeg 和 imageio-ffmpeg (moviepy 依赖) 自带的 ffmpeg。"""
+    path = env_str("MW_ASR_FFMPEG") or shutil.which("ffmpeg")
+    if path:
+        return path
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        raise RuntimeError("未找到 ffmpeg，请安装 ffmpeg 或设置环境变量 MW_ASR_FFMPEG 指向 ffmpeg 可执行文件。") from None
+
+
+def escape_filter_value(value: str) -> str:
+    """转义 ffmpeg 滤镜参数中的路径 (Windows 反斜杠、盘符冒号和单引号)。"""
+    value = value.replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+    return f"'{value}'"
+
+
+def subtitles_filter(subtitle_path, fonts_dir=None):
+    vf = f"subtitles=filename={escape_filter_value(subtitle_path)}"
+    if fonts_dir:
+        vf += f":fontsdir={escape_filter_value(fonts_dir)}"
+    # yuv420p 要求宽高为偶数
+    return vf + ",pad=ceil(iw/2)*2:ceil(ih/2)*2"
+
+
+def write_wav(path, waveform, sample_rate):
+    """把 [channels, samples] 的浮点波形写为 16 位 PCM wav。"""
+    data = np.clip(np.asarray(waveform, dtype=np.float32), -1.0, 1.0)
+    pcm = (data.T * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(data.shape[0])
+        f.setsampwidth(2)
+        f.setframerate(int(sample_rate))
+        f.writeframes(pcm.tobytes())
+
+
+def run_ffmpeg(args, frame_windows=None):
+    """
+    运行 ffmpeg；frame_windows 为 uint8 帧数组 [k, H, W, 3] 的迭代器时，逐段写入 stdin (rawvideo)。
+    失败时抛出包含 ffmpeg 错误输出的 RuntimeError。
+    """
+    cmd = [find_ffmpeg(), "-hide_banner", "-loglevel", "error", "-y"] + args
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE if frame_windows is not None else subprocess.DEVNULL, stderr=stderr
+        )
+        try:
+            if frame_windows is not None:
+                for frames in frame_windows:
+                    proc.stdin.write(np.ascontiguousarray(frames).tobytes())
+        except BrokenPipeError:
+            pass
+        except BaseException:
+            # 生成帧时出错或被中断：不能让 ffmpeg 继续等待 stdin，直接结束进程
+            proc.kill()
+            raise
+        finally:
+            if proc.stdin is not None:
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+            returncode = proc.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg 运行失败 (返回码 {returncode}): {message[-2000:]}")
+
+
+def temp_path(suffix, directory=None):
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    os.close(fd)
+    return path
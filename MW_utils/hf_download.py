@@ -1,4 +1,3 @@
-from huggingface_hub import snapshot_download
 from typing import Dict, Iterable, List, Literal, Optional, Type, Union
 import os
 
@@ -46,11 +45,8 @@ def download_model_with_snapshot(
     :return: 下载文件的本地路径
     """
     
-    if not os.path.exists(local_dir):
-        os.makedirs(local_dir)
-    else:
-        print(f"模型文件夹{local_dir}已存在。")
-        return local_dir
+    # 目录已存在时也交给 snapshot_download：已完整的文件会被跳过，未完成的文件从 .incomplete 续传
+    os.makedirs(local_dir, exist_ok=True)
 
     download_params = {
         "repo_id": repo_id,
@@ -75,6 +71,7 @@ def download_model_with_snapshot(
     }
 
     download_params = {key: value for key, value in download_params.items() if value is not None}
+    from huggingface_hub import snapshot_download
     print(f"开始下载模型 https://huggingface.co/{repo_id} 到本地目录 {local_dir}...")
     snapshot_path = snapshot_download(**download_params)
 
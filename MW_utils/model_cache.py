@@ -0,0 +1,145 @@
+import gc
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+from .config import env_int
+
+MB = 1024 * 1024
+
+
+def dir_size_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ModelCache:
+    """
+    按 key 缓存多个已加载模型的 LRU 注册表。
+    CPU 模型计入内存预算，CUDA 模型计入显存预算，预算为 0 表示不限制。
+    同一 key 正在加载时 (例如后台预加载)，其他调用者等待这次加载完成，不会重复加载；
+    加载本身在锁外进行，不阻塞其他 key 的命中。
+    """
+
+    def __init__(self, ram_budget_bytes: int = 0, vram_budget_bytes: int = 0):
+        self.ram_budget_bytes = ram_budget_bytes
+        self.vram_budget_bytes = vram_budget_bytes
+        self._entries: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._loading: "dict[Hashable, Future]" = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _is_cuda(device: str) -> bool:
+        return str(device).startswith("cuda")
+
+    def _budget(self, device: str) -> int:
+        return self.vram_budget_bytes if self._is_cuda(device) else self.ram_budget_bytes
+
+    def _used(self, device: str) -> int:
+        cuda = self._is_cuda(device)
+        return sum(e["size"] for e in self._entries.values() if self._is_cuda(e["device"]) == cuda)
+
+    def _make_room(self, device: str, incoming: int):
+        budget = self._budget(device)
+        if budget <= 0:
+            return
+        cuda = self._is_cuda(device)
+        while self._used(device) + incoming > budget:
+            victim = next((k for k, e in self._entries.items() if self._is_cuda(e["device"]) == cuda), None)
+            if victim is None:
+                break
+            print(f"ASR model cache over budget, evicting {victim}")
+            self._pop(victim)
+
+    def _pop(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self.evictions += 1
+        del entry
+        self._release()
+
+    @staticmethod
+    def _release():
+        gc.collect()
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def get(self, key: Hashable, loader: Callable[[], Any], size_bytes: int = 0, device: str = "cpu") -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["model"]
+            pending = self._loading.get(key)
+            if pending is None:
+                self.misses += 1
+                self._make_room(device, size_bytes)
+                future = self._loading[key] = Future()
+        if pending is not None:
+            print(f"ASR model {key} is being loaded by another thread, waiting for it")
+            model = pending.result()
+            with self._lock:
+                self.hits += 1
+            return model
+
+        try:
+            model = loader()
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._entries[key] = {"model": model, "size": size_bytes, "device": device}
+            del self._loading[key]
+        future.set_result(model)
+        return model
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def is_loading(self, key: Hashable) -> bool:
+        return key in self._loading
+
+    def evict(self, key: Hashable) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._pop(key)
+            return True
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._pop(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "models": [str(k) for k in self._entries],
+                "loading": [str(k) for k in self._loading],
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "ram_used_mb": round(self._used("cpu") / MB, 1),
+                "vram_used_mb": round(self._used("cuda") / MB, 1),
+            }
+
+
+def create_model_cache() -> ModelCache:
+    return ModelCache(
+        ram_budget_bytes=env_int("MW_ASR_RAM_BUDGET_MB", 0) * MB,
+        vram_budget_bytes=env_int("MW_ASR_VRAM_BUDGET_MB", 0) * MB,
+    )
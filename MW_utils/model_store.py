@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from functools import lru_cache
+
+from .config import env_bool, env_str
+from .hf_download import download_model_with_snapshot
+
+MANIFEST_NAME = ".mw_manifest.json"
+HASH_BLOCK = 8 * 1024 * 1024
+DEFAULT_ENDPOINT = "https://hf-mirror.com"
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def is_offline() -> bool:
+    return env_bool("MW_ASR_OFFLINE") or env_bool("HF_HUB_OFFLINE")
+
+
+def hub_endpoint() -> str:
+    """模型仓库端点：MW_ASR_HF_ENDPOINT，其次 HF_ENDPOINT，默认 hf-mirror.com。"""
+    return env_str("MW_ASR_HF_ENDPOINT") or env_str("HF_ENDPOINT", DEFAULT_ENDPOINT)
+
+
+@lru_cache(maxsize=64)
+def _sha256(path, size, mtime_ns):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_sha256(path) -> str:
+    """文件的 sha256，按 (路径, 大小, mtime) 记忆化，同一次获取流程中大文件只读一遍。"""
+    st = os.stat(path)
+    return _sha256(os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def git_blob_sha1(path) -> str:
+    """非 LFS 文件在 Hub 上的 blob id (git blob sha1)。"""
+    h = hashlib.sha1()
+    h.update(f"blob {os.path.getsize(path)}\0".encode())
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def read_manifest(model_dir):
+    try:
+        with open(os.path.join(model_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(model_dir, repo_id, requested, files, source):
+    """
+    记录每个文件的大小、sha256 和 mtime；sha256 只在写清单时计算一次。
+    requested 为请求的文件列表，files 为其中实际存在于来源中的文件 (部分模型仓库没有某些可选文件)。
+    """
+    entries = {}
+    for name in files:
+        path = os.path.join(model_dir, name)
+        st = os.stat(path)
+        entries[name] = {"size": st.st_size, "sha256": file_sha256(path), "mtime_ns": st.st_mtime_ns}
+    manifest = {"repo_id": repo_id, "source": source, "requested": sorted(requested), "files": entries}
+    save_manifest(model_dir, manifest)
+    return manifest
+
+
+def save_manifest(model_dir, manifest):
+    tmp_path = os.path.join(model_dir, MANIFEST_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(model_dir, MANIFEST_NAME))
+
+
+def verify_manifest(model_dir, manifest, requested, full=False):
+    """
+    廉价校验：清单对应同一请求文件列表，清单中的文件都存在、大小一致且 mtime 未变；
+    mtime 变化 (复制、touch) 或 full=True 时才重新计算 sha256。
+    返回 (不合格的文件名列表, 是否有文件重新哈希通过)；重新哈希通过的条目会原地更新为当前的大小和 mtime。
+    """
+    if manifest.get("requested") != sorted(requested) or not manifest.get("files"):
+        return list(requested), False
+    bad, refreshed = [], False
+    for name, entry in manifest["files"].items():
+        path = os.path.join(model_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            bad.append(name)
+            continue
+        if st.st_size != entry["size"]:
+            bad.append(name)
+        elif full or st.st_mtime_ns != entry.get("mtime_ns"):
+            if file_sha256(path) != entry["sha256"]:
+                bad.append(name)
+            elif st.st_mtime_ns != entry.get("mtime_ns"):
+                entry["size"], entry["mtime_ns"] = st.st_size, st.st_mtime_ns
+                refreshed = True
+    return bad, refreshed
+
+
+def remote_file_info(repo_id, files, endpoint):
+    """从 Hub 取得文件大小和哈希 {name: (size, kind, digest)}；无法联网时返回 None。"""
+    try:
+        from huggingface_hub import HfApi
+        info = HfApi(endpoint=endpoint).model_info(repo_id, files_metadata=True)
+    except Exception as e:
+        print(f"无法获取 {repo_id} 的远程文件信息: {e}")
+        return None
+    result = {}
+    for sibling in info.siblings or []:
+        if sibling.rfilename not in files:
+            continue
+        if sibling.lfs is not None:
+            result[sibling.rfilename] = (sibling.lfs.size, "sha256", sibling.lfs.sha256)
+        else:
+            result[sibling.rfilename] = (sibling.size, "git-sha1", sibling.blob_id)
+    return result
+
+
+def _check_remote(model_dir, remote):
+    bad = []
+    for name, (size, kind, digest) in remote.items():
+        path = os.path.join(model_dir, name)
+        if not os.path.isfile(path) or os.path.getsize(path) != size:
+            bad.append(name)
+            continue
+        if digest:
+            local = file_sha256(path) if kind == "sha256" else git_blob_sha1(path)
+            if local != digest:
+                bad.append(name)
+    return bad
+
+
+def copy_resumable(src, dst):
+    """从镜像目录复制文件；先写入 dst.part，中断后再次调用会从已复制的位置继续。"""
+    part = dst + ".part"
+    total = os.path.getsize(src)
+    done = os.path.getsize(part) if os.path.exists(part) else 0
+    if done > total:
+        os.remove(part)
+        done = 0
+    with open(src, "rb") as fin, open(part, "ab") as fout:
+        fin.seek(done)
+        shutil.copyfileobj(fin, fout, HASH_BLOCK)
+    os.replace(part, dst)
+
+
+def _from_mirror(repo_id, model_dir, files, mirror_root):
+    mirror_dir = os.path.join(mirror_root, repo_id.split("/")[-1])
+    available = [name for name in files if os.path.isfile(os.path.join(mirror_dir, name))]
+    if not available:
+        raise FileNotFoundError(f"离线镜像 {mirror_dir} 中没有模型文件。")
+    mirror_manifest = read_manifest(mirror_dir)
+    os.makedirs(model_dir, exist_ok=True)
+    for name in available:
+        dst = os.path.join(model_dir, name)
+        if os.path.isfile(dst) and os.path.getsize(dst) == os.path.getsize(os.path.join(mirror_dir, name)):
+            continue
+        print(f"从离线镜像复制 {name} 到 {model_dir}...")
+        copy_resumable(os.path.join(mirror_dir, name), dst)
+    manifest = write_manifest(model_dir, repo_id, files, available, "mirror")
+    if mirror_manifest:
+        expected = {n: e["sha256"] for n, e in mirror_manifest.get("files", {}).items()}
+        bad = [n for n in available if n in expected and manifest["files"][n]["sha256"] != expected[n]]
+        if bad:
+            os.remove(os.path.join(model_dir, MANIFEST_NAME))
+            raise RuntimeError(f"模型文件与离线镜像清单不一致: {', '.join(bad)}")
+
+
+def _local_files(model_dir, files):
+    return [name for name in files if os.path.isfile(os.path.join(model_dir, name))]
+
+
+def _use_unverified_local(model_dir, files, stale, reason):
+    """
+    无法从来源校验时使用本地文件 (例如手动下载的模型)，但不写入清单，下次仍会尝试校验；
+    清单刚校验失败 (文件被截断或修改) 时不能这样做，直接报错。返回是否可以使用本地文件。
+    """
+    if stale:
+        raise RuntimeError(
+            f"模型目录 {model_dir} 中的文件与清单不一致 (可能下载不完整或已损坏)，{reason}，无法重新获取。"
+            f"请联网重试，或设置 MW_ASR_MODEL_MIRROR，或删除该目录后手动下载。"
+        )
+    if "model.bin" not in _local_files(model_dir, files):
+        return False
+    print(f"{reason}，未校验来源，直接使用本地模型文件 {model_dir}。")
+    return True
+
+
+def _from_hub(repo_id, model_dir, files, endpoint, stale=False):
+    remote = remote_file_info(repo_id, files, endpoint)
+    if remote is None:
+        if _use_unverified_local(model_dir, files, stale, "无法联网"):
+            return
+        download_model_with_snapshot(repo_id=repo_id, local_dir=model_dir, allow_patterns=list(files), endpoint=endpoint)
+        write_manifest(model_dir, repo_id, files, _local_files(model_dir, files), "hub")
+        return
+
+    # 大小或哈希不对的文件 (例如旧版本中断下载留下的半截 model.bin) 先删除再下载
+    for name in _check_remote(model_dir, remote):
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            print(f"模型文件 {path} 不完整或已损坏，重新下载。")
+            os.remove(path)
+    # snapshot_download 会跳过已完整的文件，并从 .incomplete 续传未完成的文件
+    download_model_with_snapshot(repo_id=repo_id, local_dir=model_dir, allow_patterns=list(files), endpoint=endpoint)
+    bad = _check_remote(model_dir, remote)
+    if bad:
+        raise RuntimeError(f"模型 {repo_id} 下载的文件缺失或大小、哈希不正确: {', '.join(bad)}，请重试。")
+    write_manifest(model_dir, repo_id, files, list(remote), "hub")
+
+
+def ensure_model(repo_id, model_dir, files, endpoint=None):
+    """
+    保证 model_dir 中存在 files 列出的完整模型文件，并返回 model_dir。
+
+    - 已有清单且廉价校验通过：直接返回，不访问网络；
+    - 设置 MW_ASR_MODEL_MIRROR 时从本地镜像目录 (<镜像>/<模型名>/...) 断点复制；
+    - 离线模式 (MW_ASR_OFFLINE / HF_HUB_OFFLINE) 且没有镜像：只使用本地文件；
+    - 否则对照 Hub (endpoint，默认见 hub_endpoint()) 上的大小和哈希补全下载 (断点续传)，完成后写入清单。
+    没有清单的旧模型目录 (手动下载或旧版本下载) 在联网校验后写入清单；离线或无法联网时直接使用但不写清单。
+    清单校验失败且无法从来源重新获取时抛出 RuntimeError，不会用磁盘上的文件覆盖清单。
+    """
+    files = list(files)
+    endpoint = endpoint or hub_endpoint()
+    with _locks_guard:
+        lock = _locks.setdefault(os.path.abspath(model_dir), threading.Lock())
+    with lock:
+        manifest = read_manifest(model_dir)
+        if manifest is not None:
+            bad, refreshed = verify_manifest(model_dir, manifest, files, full=env_bool("MW_ASR_VERIFY_MODEL_HASH"))
+            if not bad:
+                if refreshed:
+                    # 复制或 touch 过的目录只重新哈希一次，之后的进程按新的 mtime 走廉价校验
+                    try:
+                        save_manifest(model_dir, manifest)
+                    except OSError as e:
+                        print(f"更新模型清单 {model_dir} 失败: {e}")
+                return model_dir
+        stale = manifest is not None
+        if stale:
+            print(f"模型目录 {model_dir} 与清单不一致，重新获取。")
+
+        mirror_root = env_str("MW_ASR_MODEL_MIRROR")
+        if mirror_root:
+            _from_mirror(repo_id, model_dir, files, mirror_root)
+        elif is_offline():
+            if not _use_unverified_local(model_dir, files, stale, "离线模式"):
+                raise FileNotFoundError(
+                    f"离线模式下模型文件缺失: {model_dir}。请手动下载或设置 MW_ASR_MODEL_MIRROR。"
+                )
+        else:
+            _from_hub(repo_id, model_dir, files, endpoint, stale)
+        return model_dir
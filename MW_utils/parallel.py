@@ -0,0 +1,20 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+def resolve_workers(workers: int) -> int:
+    """0 或负数表示使用全部 CPU 核心。"""
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def parallel_map(fn, items, workers: int = 1):
+    """
+    用线程池按顺序对 items 执行 fn，返回与串行 map 相同顺序的结果列表。
+    numpy 大数组运算和 Pillow 绘制会释放 GIL，因此线程即可利用多核，也无需在进程间复制帧数据。
+    """
+    items = list(items)
+    workers = min(resolve_workers(workers), len(items))
+    if workers <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fn, items))
@@ -0,0 +1,178 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from .config import env_bool, env_str
+
+MB = 1024 * 1024
+_metrics_lock = threading.Lock()
+
+
+def current_rss_bytes():
+    """当前进程常驻内存；优先使用 psutil (可选依赖)，Linux 上回退到 /proc/self/statm，都不可用时返回 None。"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MemorySampler:
+    """在后台线程中按 interval 秒采样常驻内存，记录阶段内的峰值。"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.start_bytes = self.peak_bytes = current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = None
+        if self.start_bytes is not None:
+            self._thread = threading.Thread(target=self._run, name="asr_mw_memory_sampler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        if rss is not None and rss > self.peak_bytes:
+            self.peak_bytes = rss
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+        return self.start_bytes, self.peak_bytes
+
+
+def _cuda():
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        return torch.cuda
+    return None
+
+
+class StageProfiler:
+    """
+    按阶段记录墙钟时间、进程 CPU 时间和内存峰值 (常驻内存采样，CUDA 可用时另记显存峰值)，
+    节点的 性能统计 输入或环境变量 MW_ASR_PROFILE=1 开启；未开启时所有方法都是空操作。
+
+    stage() 用于顺序执行的阶段，同名阶段多次进入时累加；
+    线程池中并行的子步骤用 timed() 累加各线程的耗时 (busy_s，可能大于墙钟时间)。
+    """
+
+    def __init__(self, node: str, enabled: bool = False):
+        self.node = node
+        self.enabled = bool(enabled) or env_bool("MW_ASR_PROFILE")
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def _entry(self, name):
+        return self.stages.setdefault(name, {"count": 0})
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return nullcontext()
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name):
+        cuda = _cuda()
+        if cuda is not None:
+            cuda.reset_peak_memory_stats()
+        sampler = MemorySampler()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            start_bytes, peak_bytes = sampler.stop()
+            with self._lock:
+                entry = self._entry(name)
+                entry["count"] += 1
+                entry["wall_s"] = entry.get("wall_s", 0.0) + wall
+                entry["cpu_s"] = entry.get("cpu_s", 0.0) + cpu
+                if peak_bytes is not None:
+                    entry["peak_rss_mb"] = max(entry.get("peak_rss_mb", 0.0), peak_bytes / MB)
+                    entry["rss_delta_mb"] = entry.get("rss_delta_mb", 0.0) + (current_rss_bytes() - start_bytes) / MB
+                if cuda is not None:
+                    entry["peak_vram_mb"] = max(entry.get("peak_vram_mb", 0.0), cuda.max_memory_allocated() / MB)
+
+    def timed(self, name: str):
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                entry = self._entry(name)
+                entry["count"] += 1
+                entry["busy_s"] = entry.get("busy_s", 0.0) + elapsed
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "node": self.node,
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "total_wall_s": time.perf_counter() - self._start,
+                "peak_rss_mb": max((s.get("peak_rss_mb", 0.0) for s in self.stages.values()), default=0.0),
+                "stages": {name: dict(entry) for name, entry in self.stages.items()},
+            }
+
+    def finish(self, **extra) -> str:
+        """打印汇总，按 MW_ASR_METRICS_FILE 追加一行 JSON，并返回 JSON 字符串；未开启时返回空字符串。"""
+        if not self.enabled:
+            return ""
+        summary = self.summary()
+        summary.update(extra)
+        print(format_summary(summary))
+        text = json.dumps(summary, ensure_ascii=False)
+        metrics_file = env_str("MW_ASR_METRICS_FILE")
+        if metrics_file:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(metrics_file)), exist_ok=True)
+                with _metrics_lock, open(metrics_file, "a", encoding="utf-8") as f:
+                    f.write(text + "\n")
+            except OSError as e:
+                print(f"性能统计写入 {metrics_file} 失败: {e}")
+        return text
+
+
+def format_summary(summary: dict) -> str:
+    lines = [f"[ComfyUI_ASR] {summary['node']} 性能统计: 总耗时 {summary['total_wall_s']:.2f} s，"
+             f"峰值内存 {summary['peak_rss_mb']:.0f} MB"]
+    for name, entry in summary["stages"].items():
+        parts = []
+        if "wall_s" in entry:
+            parts.append(f"{entry['wall_s']:.3f} s (CPU {entry['cpu_s']:.3f} s)")
+        if "busy_s" in entry:
+            parts.append(f"线程累计 {entry['busy_s']:.3f} s")
+        if "peak_rss_mb" in entry:
+            parts.append(f"峰值 {entry['peak_rss_mb']:.0f} MB ({entry['rss_delta_mb']:+.0f} MB)")
+        if "peak_vram_mb" in entry:
+            parts.append(f"显存峰值 {entry['peak_vram_mb']:.0f} MB")
+        if entry["count"] > 1:
+            parts.append(f"x{entry['count']}")
+        lines.append(f"  {name:<16} " + ", ".join(parts))
+    return "\n".join(lines)
+
+
+# 未传入 profiler 时的默认值，不受 MW_ASR_PROFILE 影响
+NO_PROFILER = StageProfiler("")
+NO_PROFILER.enabled = False
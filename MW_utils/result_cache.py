@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+MB = 1024 * 1024
+
+
+class ResultCache:
+    """
+    以内容哈希为键的识别结果磁盘缓存。
+    每条结果一个 JSON 文件，命中时刷新 mtime，总大小超出 max_bytes 时按 mtime 淘汰最旧的文件。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(waveform, sample_rate: int, params: dict) -> str:
+        return ResultCache.make_keys(waveform, sample_rate, [params])[0]
+
+    @staticmethod
+    def make_keys(waveform, sample_rate: int, params_list) -> list:
+        """同一段音频对应多组参数的键；音频只哈希一次。"""
+        data = np.ascontiguousarray(waveform.detach().cpu().numpy())
+        h = hashlib.blake2b(digest_size=32)
+        h.update(str((data.dtype.str, data.shape, sample_rate)).encode("utf-8"))
+        h.update(memoryview(data).cast("B"))
+        keys = []
+        for params in params_list:
+            hp = h.copy()
+            hp.update(json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+            keys.append(hp.hexdigest())
+        return keys
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path, None)
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, value) -> None:
+        """写入失败 (磁盘已满、目录只读等) 时只打印警告，不影响已完成的识别。"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._evict()
+        except (OSError, TypeError, ValueError) as e:
+            print(f"识别结果缓存写入失败: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        with self._lock:
+            evict_by_mtime(self.cache_dir, self.max_bytes, ".json")
+
+
+def evict_by_mtime(cache_dir: str, max_bytes: int, suffix: str) -> None:
+    """删除 cache_dir 下最久未访问 (mtime 最旧) 的 suffix 文件，直到总大小不超过 max_bytes；max_bytes <= 0 表示不限制。"""
+    if max_bytes <= 0:
+        return
+    files = []
+    for root, _, names in os.walk(cache_dir):
+        for name in names:
+            if not name.endswith(suffix):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
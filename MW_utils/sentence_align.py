@@ -0,0 +1,131 @@
+import re
+from itertools import accumulate
+
+from .text_models import get_jieba
+
+PUNCTUATION = "＂＃＄％＆＇（）＊＋，－／：；＜＝＞＠［＼］＾＿｀｛｜｝～｟｠｢｣､、〃『』【】〖〗〘〙〚〛〜〝〞〟–—‘’‛„‟…‧﹏." \
+              "!?(),;:[]{}<>\"+-=&^*%$#@/" \
+              "。？！，、；：“”‘'《》〈〉「」〔〕——·~`-"
+
+PUNCTUATION_SET = frozenset(PUNCTUATION)
+NORMALIZE_PATTERN = re.compile(r'[\s' + re.escape(PUNCTUATION) + r']+')
+
+
+def is_punctuation(text):
+    return all(char in PUNCTUATION_SET for char in text.strip())
+
+
+def normalized_length(text):
+    """去掉空白和标点后的字符数，用于把逐词结果与逐句文本对齐。"""
+    return len(NORMALIZE_PATTERN.sub('', text))
+
+
+def create_custom_sentences(words_list, sentences_list, max_len, lang="zh"):
+    """
+    按每句最大长度把逐句结果重新切分，并从逐词时间戳取得每个新句子的起止时间。
+
+    逐词和逐句的归一化长度只计算一次，借助前缀和在一次线性扫描中把单词分配给句子，
+    再在句内做分块；中文按 jieba 分词、其他语言按单词累计长度。
+    """
+    if not any(s[2] for s in sentences_list): return []
+    custom_sentences_list = []
+
+    word_offsets = [0]
+    word_offsets.extend(accumulate(normalized_length(w[2]) for w in words_list))
+    total_words = len(words_list)
+    global_word_cursor = 0
+
+    for sent_start, sent_end, sent_text in sentences_list:
+        target_len = normalized_length(sent_text)
+        base = word_offsets[global_word_cursor]
+        temp_cursor = global_word_cursor
+        while temp_cursor < total_words and word_offsets[temp_cursor] - base < target_len:
+            temp_cursor += 1
+        sentence_words = words_list[global_word_cursor:temp_cursor]
+        global_word_cursor = temp_cursor
+        if not sentence_words: continue
+
+        if lang == "zh":
+            _split_zh(sentence_words, sent_text, max_len, custom_sentences_list)
+        else:
+            _split_words(sentence_words, max_len, custom_sentences_list)
+
+    return custom_sentences_list
+
+
+def _split_zh(sentence_words, sent_text, max_len, custom_sentences_list):
+    jieba_words = [w.strip() for w in get_jieba().lcut(sent_text) if w.strip()]
+    is_punct = [is_punctuation(w) for w in jieba_words]
+    local_word_cursor = 0
+    jieba_cursor = 0
+
+    while jieba_cursor < len(jieba_words):
+        core_words = []
+        current_len = 0
+        while jieba_cursor < len(jieba_words):
+            token = jieba_words[jieba_cursor]
+            if is_punct[jieba_cursor]:
+                break
+            if current_len + len(token) > max_len and core_words:
+                break
+            core_words.append(token)
+            current_len += len(token)
+            jieba_cursor += 1
+
+        if not core_words:
+            if jieba_cursor < len(jieba_words) and is_punct[jieba_cursor]:
+                if custom_sentences_list:
+                    custom_sentences_list[-1][2] += jieba_words[jieba_cursor]
+                jieba_cursor += 1
+            continue
+
+        chunk_parts = core_words
+        chunk_len = current_len
+
+        chars_consumed = 0
+        start_idx = local_word_cursor
+        end_idx = local_word_cursor
+        for i in range(start_idx, len(sentence_words)):
+            chars_consumed += len(sentence_words[i][2])
+            end_idx = i
+            if chars_consumed >= chunk_len: break
+
+        start_time, end_time = -1, -1
+        if start_idx <= end_idx < len(sentence_words):
+            start_time = sentence_words[start_idx][0]
+            end_time = sentence_words[end_idx][1]
+            local_word_cursor = end_idx + 1
+
+        while jieba_cursor < len(jieba_words) and is_punct[jieba_cursor]:
+            chunk_parts.append(jieba_words[jieba_cursor])
+            jieba_cursor += 1
+
+        if start_time != -1:
+            custom_sentences_list.append([start_time, end_time, "".join(chunk_parts)])
+
+
+def _split_words(sentence_words, max_len, custom_sentences_list):
+    current_chunk_tokens = []
+    current_chunk_len = 0
+
+    def flush():
+        chunk_text = " ".join(t[2] for t in current_chunk_tokens)
+        custom_sentences_list.append([current_chunk_tokens[0][0], current_chunk_tokens[-1][1], chunk_text])
+
+    for s, e, w in sentence_words:
+        token_text = w.strip()
+        if not token_text: continue
+        if not current_chunk_tokens and is_punctuation(token_text) and custom_sentences_list:
+            last_item = custom_sentences_list[-1]
+            last_item[1] = e
+            last_item[2] += (" " + token_text)
+            continue
+        if current_chunk_len + len(token_text) + 1 > max_len and current_chunk_tokens:
+            flush()
+            current_chunk_tokens = [[s, e, token_text]]
+            current_chunk_len = len(token_text)
+        else:
+            current_chunk_len += len(token_text) + (1 if current_chunk_tokens else 0)
+            current_chunk_tokens.append([s, e, token_text])
+    if current_chunk_tokens:
+        flush()
@@ -0,0 +1,117 @@
+SUBTITLE_FORMATS = ["srt", "vtt", "ass"]
+
+
+def _split_ms(seconds):
+    ms = max(int(round(seconds * 1000)), 0)
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    secs, ms = divmod(ms, 1000)
+    return hours, minutes, secs, ms
+
+
+def srt_time(seconds):
+    h, m, s, ms = _split_ms(seconds)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def vtt_time(seconds):
+    h, m, s, ms = _split_ms(seconds)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def ass_time(seconds):
+    cs = max(int(round(seconds * 100)), 0)
+    h, cs = divmod(cs, 360000)
+    m, cs = divmod(cs, 6000)
+    s, cs = divmod(cs, 100)
+    return f"{h:d}:{m:02d}:{s:02d}.{cs:02d}"
+
+
+def to_srt(subtitles):
+    """subtitles: [(start, end, text), ...]，时间单位为秒。"""
+    blocks = []
+    for index, (start, end, text) in enumerate(subtitles, 1):
+        blocks.append(f"{index}\n{srt_time(start)} --> {srt_time(end)}\n{text.strip()}\n")
+    return "\n".join(blocks)
+
+
+def to_vtt(subtitles):
+    blocks = ["WEBVTT\n"]
+    for start, end, text in subtitles:
+        blocks.append(f"{vtt_time(start)} --> {vtt_time(end)}\n{text.strip()}\n")
+    return "\n".join(blocks)
+
+
+def ass_color(rgb, opacity=1.0):
+    """(R, G, B) + 不透明度 -> ASS 的 &HAABBGGRR (ASS 中 alpha 00 为不透明)。"""
+    alpha = 255 - int(round(max(0.0, min(1.0, opacity)) * 255))
+    r, g, b = rgb
+    return f"&H{alpha:02X}{b:02X}{g:02X}{r:02X}"
+
+
+class AssStyle:
+    """
+    ASS 默认样式，字段与字幕节点的选项对应。
+    背景透明度大于 0 时使用 BorderStyle 3 (不透明背景框)，框的颜色和透明度取背景色，
+    框与文字的间距为 box_padding；此时 libass 不再绘制文字描边。
+    """
+
+    def __init__(self, font_name, font_size, font_color=(255, 255, 255), bg_color=(0, 0, 0), bg_opacity=0.0,
+                 stroke_color=None, stroke_width=0, margin_l=10, margin_r=10, margin_v=30, box_padding=5,
+                 play_res=(1920, 1080), alignment=2):
+        self.font_name = font_name
+        self.font_size = font_size
+        self.font_color = font_color
+        self.bg_color = bg_color
+        self.bg_opacity = bg_opacity
+        self.stroke_color = stroke_color or font_color
+        self.stroke_width = stroke_width
+        self.margin_l = margin_l
+        self.margin_r = margin_r
+        self.margin_v = margin_v
+        self.box_padding = box_padding
+        self.play_res = play_res
+        self.alignment = alignment
+
+    def style_line(self, name="Default"):
+        if self.bg_opacity > 0:
+            border_style, outline = 3, self.box_padding
+            outline_colour = ass_color(self.bg_color, self.bg_opacity)
+        else:
+            border_style, outline = 1, self.stroke_width
+            outline_colour = ass_color(self.stroke_color)
+        back_colour = ass_color(self.bg_color, self.bg_opacity)
+        fields = [
+            name, self.font_name, self.font_size, ass_color(self.font_color), ass_color(self.font_color),
+            outline_colour, back_colour, 0, 0, 0, 0, 100, 100, 0, 0, border_style, outline, 0,
+            self.alignment, self.margin_l, self.margin_r, self.margin_v, 1,
+        ]
+        return "Style: " + ",".join(str(f) for f in fields)
+
+
+def _ass_text(text):
+    return text.strip().replace("\r\n", "\n").replace("\n", "\\N").replace("{", "(").replace("}", ")")
+
+
+def to_ass(subtitles, style: AssStyle):
+    width, height = style.play_res
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "WrapStyle: 0",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding",
+        style.style_line(),
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for start, end, text in subtitles:
+        lines.append(f"Dialogue: 0,{ass_time(start)},{ass_time(end)},Default,,0,0,0,,{_ass_text(text)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from .config import env_int, env_str
+from .result_cache import MB, evict_by_mtime
+
+
+def render_text_rgba(text, font_path, font_size, font_color, bg_color, stroke_color, stroke_width,
+                     margin, text_align='left', interline=4, size=(None, None), method='label'):
+    """
+    用 moviepy TextClip 渲染一段文本，返回 [h, w, 4] 的 uint8 RGBA 数组 (未预乘)。
+    颜色参数为 RGB / RGBA 元组。
+    """
+    from moviepy import TextClip
+    clip = TextClip(text=text, font=font_path, font_size=font_size, color=f'rgb{tuple(font_color)}',
+                    bg_color=f'rgba{tuple(bg_color)}', stroke_color=f'rgb{tuple(stroke_color)}',
+                    stroke_width=stroke_width, method=method, text_align=text_align, margin=margin,
+                    interline=interline, size=size)
+    rgb = clip.get_frame(0)
+    alpha = np.rint(clip.mask.get_frame(0) * 255)
+    return np.dstack([rgb, alpha]).astype(np.uint8)
+
+
+@lru_cache(maxsize=256)
+def _file_digest(path, mtime_ns, size):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def font_file_hash(font_path):
+    """字体文件内容的哈希，按 (路径, mtime, 大小) 记忆化；替换同名字体文件后缓存键随之改变。"""
+    st = os.stat(font_path)
+    return _file_digest(os.path.abspath(font_path), st.st_mtime_ns, st.st_size)
+
+
+class SpriteCache:
+    """
+    预渲染字幕块 (RGBA 位图) 的缓存，跨多次运行共享。
+    键为包含文本、字体文件哈希、字号、颜色、描边、边距、换行宽度等的元组；
+    内存中按总字节数做 LRU 淘汰，设置 disk_dir 时同时以 .npy 持久化到磁盘，并按 mtime 淘汰。
+    """
+
+    DISK_EVICT_EVERY = 64
+
+    def __init__(self, max_bytes: int, disk_dir: str = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._saves = 0
+
+    @staticmethod
+    def make_key(key: tuple) -> str:
+        return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=20).hexdigest()
+
+    def _disk_path(self, digest):
+        return os.path.join(self.disk_dir, digest[:2], f"{digest}.npy")
+
+    def get(self, key: tuple, render):
+        """返回 key 对应的位图，未命中时调用 render() 渲染并缓存。返回的数组只读。"""
+        digest = self.make_key(key)
+        with self._lock:
+            image = self._items.get(digest)
+            if image is not None:
+                self._items.move_to_end(digest)
+                self.hits += 1
+                return image
+
+        image = self._load(digest)
+        if image is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            image = np.ascontiguousarray(render(), dtype=np.uint8)
+            self._save(digest, image)
+        image.flags.writeable = False
+        self._remember(digest, image)
+        return image
+
+    def _remember(self, digest, image):
+        with self._lock:
+            if digest in self._items:
+                return
+            self._items[digest] = image
+            self._bytes += image.nbytes
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                _, old = self._items.popitem(last=False)
+                self._bytes -= old.nbytes
+
+    def _load(self, digest):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(digest)
+        try:
+            image = np.load(path, allow_pickle=False)
+            os.utime(path, None)
+            return image
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, digest, image):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(digest)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, image, allow_pickle=False)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._saves += 1
+                evict = self._saves % self.DISK_EVICT_EVERY == 1
+            if evict:
+                evict_by_mtime(self.disk_dir, self.disk_max_bytes, ".npy")
+        except OSError as e:
+            print(f"字幕缓存写入失败: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {"items": len(self._items), "bytes": self._bytes, "hits": self.hits,
+                    "disk_hits": self.disk_hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+
+def create_sprite_cache():
+    """按环境变量 MW_ASR_SPRITE_CACHE_MB / MW_ASR_SPRITE_CACHE_DIR / MW_ASR_SPRITE_DISK_MB 创建字幕块缓存。"""
+    return SpriteCache(
+        env_int("MW_ASR_SPRITE_CACHE_MB", 256) * MB,
+        disk_dir=env_str("MW_ASR_SPRITE_CACHE_DIR") or None,
+        disk_max_bytes=env_int("MW_ASR_SPRITE_DISK_MB", 1024) * MB,
+    )
+
+
+def stack_lines(images, interline: int):
+    """把若干行 RGBA 位图左对齐、自上而下排列到一张透明画布上。"""
+    height = sum(im.shape[0] for im in images) + max(0, len(images) - 1) * interline
+    width = max(im.shape[1] for im in images)
+    canvas = np.zeros((int(height), width, 4), dtype=np.uint8)
+    y = 0
+    for im in images:
+        canvas[y:y + im.shape[0], :im.shape[1]] = im
+        y += im.shape[0] + interline
+    return canvas
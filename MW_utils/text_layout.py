@@ -0,0 +1,77 @@
+import threading
+from functools import lru_cache
+from itertools import accumulate
+
+from PIL import Image, ImageDraw, ImageFont
+
+# 与 moviepy TextClip 默认的 interline 一致，单行文本不受影响
+DEFAULT_SPACING = 4
+
+
+class TextMeasurer:
+    """
+    用缓存的 PIL 字体对象测量文本宽度，结果与 moviepy TextClip(method='label').w 一致，
+    但不渲染图像。单字前进宽度和整段文本宽度都按 (字体, 字号, 描边) 记忆化。
+    """
+
+    MAX_CACHED_RUNS = 200000
+
+    def __init__(self, font_path, font_size, stroke_width=0):
+        self.font = ImageFont.truetype(font_path, font_size)
+        self.stroke_width = stroke_width
+        self._draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+        self._advances = {}
+        self._widths = {}
+        self._lock = threading.Lock()
+
+    def width(self, text):
+        w = self._widths.get(text)
+        if w is None:
+            with self._lock:
+                left, _, right, _ = self._draw.multiline_textbbox(
+                    (0, 0), text, font=self.font, spacing=DEFAULT_SPACING, align="left",
+                    stroke_width=self.stroke_width, anchor="ls",
+                )
+            w = int(right - left)
+            if len(self._widths) >= self.MAX_CACHED_RUNS:
+                self._widths.clear()
+            self._widths[text] = w
+        return w
+
+    def advance(self, char):
+        a = self._advances.get(char)
+        if a is None:
+            a = self._advances[char] = self.font.getlength(char)
+        return a
+
+    def prefix_advances(self, text):
+        """逐字前进宽度的前缀和，用于估算断行位置。"""
+        return [0.0] + list(accumulate(self.advance(c) for c in text))
+
+    def fit(self, text, start, max_width, prefix=None):
+        """
+        返回最大的 end (> start)，使 text[start:end] 的宽度不超过 max_width；首字符总是保留在本行。
+        先用前进宽度前缀和估算，再用精确宽度向前/向后微调，只需少量精确测量。
+        """
+        n = len(text)
+        if prefix is None:
+            prefix = self.prefix_advances(text)
+        budget = max_width - 2 * self.stroke_width
+        lo, hi = start + 1, n
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if prefix[mid] - prefix[start] <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        end = lo
+        while end < n and self.width(text[start:end + 1]) <= max_width:
+            end += 1
+        while end > start + 1 and self.width(text[start:end]) > max_width:
+            end -= 1
+        return end
+
+
+@lru_cache(maxsize=64)
+def get_measurer(font_path, font_size, stroke_width=0):
+    return TextMeasurer(font_path, font_size, stroke_width)
@@ -0,0 +1,70 @@
+import os
+import threading
+
+_lock = threading.Lock()
+_jieba = None
+_langid = None
+_jieba_cache_dir = None
+
+
+def set_jieba_cache_dir(path: str):
+    """设置 jieba 词典缓存的持久化目录 (默认在系统临时目录，容器重启后会丢失)。"""
+    global _jieba_cache_dir
+    _jieba_cache_dir = path
+
+
+def get_jieba():
+    """首次使用时导入 jieba，并从持久化的词典缓存初始化。"""
+    global _jieba
+    if _jieba is None:
+        with _lock:
+            if _jieba is None:
+                import logging
+                import jieba
+
+                jieba.setLogLevel(logging.WARNING)
+                if _jieba_cache_dir:
+                    os.makedirs(_jieba_cache_dir, exist_ok=True)
+                    jieba.dt.tmp_dir = _jieba_cache_dir
+                jieba.initialize()
+                _jieba = jieba
+    return _jieba
+
+
+def get_langid():
+    """首次使用时导入 langid 并加载一次模型，之后复用同一个 LanguageIdentifier。"""
+    global _langid
+    if _langid is None:
+        with _lock:
+            if _langid is None:
+                from langid.langid import LanguageIdentifier, model
+
+                _langid = LanguageIdentifier.from_modelstring(model, norm_probs=True)
+    return _langid
+
+
+def classify_language(text: str):
+    return get_langid().classify(text)
+
+
+def detect_language(text: str, max_chars: int = 1500):
+    """只对有限长度的样本 (开头、中间、结尾各取一段) 做语言识别，避免对整篇长文本分类。"""
+    if len(text) > max_chars:
+        part = max_chars // 3
+        middle = len(text) // 2 - part // 2
+        text = " ".join((text[:part], text[middle:middle + part], text[-part:]))
+    return classify_language(text)
+
+
+# Whisper 对汉字文本可能给出的语言代码；断句、拼接和换行只按 "zh" 处理中文
+CHINESE_SCRIPT_LANGUAGES = {"zh", "yue"}
+
+
+def normalize_language(lang):
+    """把 Whisper 的语言代码归一化为文本处理使用的代码 (粤语 yue 等汉字文本按 zh 处理)。"""
+    return "zh" if lang in CHINESE_SCRIPT_LANGUAGES else lang
+
+
+def warm_up():
+    """在后台线程中预先加载 jieba 词典和 langid 模型。"""
+    threading.Thread(target=lambda: (get_jieba(), get_langid()), name="asr_mw_text_models", daemon=True).start()
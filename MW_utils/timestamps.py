@@ -0,0 +1,45 @@
+import numpy as np
+
+TIMESTAMPS_TYPE = "MW_TIMESTAMPS"
+
+
+def convert_to_string(lst):
+    return "\n".join([f"({round(x[0], 2)}, {round(x[1], 2)}) {x[2]}" for x in lst])
+
+
+class TimestampTrack:
+    """
+    逐词或逐句时间戳的列式结构: start / end 为 float64 数组 (秒，不做取整)，text 为文本列表。
+    作为 MW_TIMESTAMPS 类型在节点之间直接传递，避免文本序列化再正则解析。
+    language / language_probability 为识别时检测到的语言，下游无需再次做语言识别。
+    """
+
+    __slots__ = ("start", "end", "text", "language", "language_probability")
+
+    def __init__(self, start, end, text, language=None, language_probability=None):
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.text = list(text)
+        self.language = language
+        self.language_probability = language_probability
+        if not (len(self.start) == len(self.end) == len(self.text)):
+            raise ValueError("start, end 和 text 长度必须一致")
+
+    @classmethod
+    def from_list(cls, items, language=None, language_probability=None):
+        if not items:
+            return cls([], [], [], language, language_probability)
+        start, end, text = zip(*items)
+        return cls(start, end, text, language, language_probability)
+
+    def to_list(self):
+        return [[s, e, t] for s, e, t in zip(self.start.tolist(), self.end.tolist(), self.text)]
+
+    def __len__(self):
+        return len(self.text)
+
+    def __iter__(self):
+        return iter(zip(self.start.tolist(), self.end.tolist(), self.text))
+
+    def __repr__(self):
+        return f"TimestampTrack({len(self)} items, language={self.language})"
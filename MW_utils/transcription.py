@@ -0,0 +1,176 @@
+import bisect
+import dataclasses
+from types import SimpleNamespace
+
+import numpy as np
+
+from .audio_utils import WHISPER_SAMPLE_RATE
+
+
+def collect_segments(segments, offset: float = 0.0, on_segment=None, words_list=None, sentences_list=None):
+    """
+    逐段消费 faster-whisper 的 segments 生成器，展开为逐词列表和逐句列表，时间整体平移 offset 秒。
+    每得到一段就调用 on_segment(sentence)，用于进度、中断检查和中间结果保存。
+    """
+    words_list = [] if words_list is None else words_list
+    sentences_list = [] if sentences_list is None else sentences_list
+    for segment in segments:
+        for i in segment.words or []:
+            words_list.append([i.start - offset, i.end - offset, i.word.strip()])
+        sentence = [segment.start - offset, segment.end - offset, segment.text.strip()]
+        sentences_list.append(sentence)
+        if on_segment is not None:
+            on_segment(sentence)
+    return words_list, sentences_list
+
+
+def summarize_info(info, duration: float) -> dict:
+    """从 TranscriptionInfo 中取出可序列化的语言信息和 VAD 后的有效语音时长。"""
+    return {
+        "language": getattr(info, "language", None),
+        "language_probability": getattr(info, "language_probability", None),
+        "duration": duration,
+        "duration_after_vad": getattr(info, "duration_after_vad", duration),
+    }
+
+
+def with_durations(info, duration: float, duration_after_vad: float):
+    """复制 TranscriptionInfo 并改写时长，用于拼接批处理或分窗识别后按各条音频重新统计。"""
+    return dataclasses.replace(info, duration=duration, duration_after_vad=duration_after_vad)
+
+
+def speech_clips(audio, vad_parameters):
+    """用 Silero VAD 检测语音区域，返回 [(start_sample, end_sample), ...]，每段不超过一个窗口 (30 秒)。"""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    options = dict(vad_parameters, max_speech_duration_s=30)
+    return [(t["start"], t["end"]) for t in get_speech_timestamps(audio, VadOptions(**options))]
+
+
+def transcribe_batched(model, audios, batch_size: int = 8, on_segment_factory=None, vad_parameters=None,
+                       **transcribe_kwargs):
+    """
+    用 BatchedInferencePipeline 批量识别多段 16 kHz 音频，返回每段的 (words_list, sentences_list, info)。
+
+    不超过一个窗口 (30 秒) 的短音频拼接成一条音频，每段作为一个 clip 一起送入编码器批处理，
+    再按 clip 偏移把识别结果拆回各段；更长的音频逐段用批处理管线 (VAD 切分) 识别。
+    管线对整条拼接音频只检测一次语言，所以未指定 language 时先逐段检测语言，按语言分组拼接，
+    混合语言的批次中每段都用自己的语言解码。
+    给出 vad_parameters 时短音频只把 VAD 检测到的语音区域作为 clip，长音频的 VAD 切分也使用这些参数。
+    on_segment_factory(index) 为第 index 段音频返回 on_segment 回调。
+    """
+    from faster_whisper import BatchedInferencePipeline
+
+    def callback(i):
+        return on_segment_factory(i) if on_segment_factory is not None else None
+
+    pipeline = BatchedInferencePipeline(model=model)
+    chunk_samples = model.feature_extractor.chunk_length * WHISPER_SAMPLE_RATE
+    results = [([], [], None) for _ in audios]
+
+    short_items = [i for i, a in enumerate(audios) if 0 < len(a) <= chunk_samples]
+    long_items = [i for i, a in enumerate(audios) if len(a) > chunk_samples]
+
+    if short_items:
+        regions = {
+            i: speech_clips(audios[i], vad_parameters) if vad_parameters else [(0, len(audios[i]))]
+            for i in short_items
+        }
+        detected = {}
+        if transcribe_kwargs.get("language") is None and model.model.is_multilingual:
+            for i in short_items:
+                if regions[i]:
+                    speech = np.concatenate([audios[i][start:end] for start, end in regions[i]])
+                    language, probability, _ = model.detect_language(speech.astype(np.float32, copy=False))
+                    detected[i] = (language, probability)
+        groups = {}
+        for i in short_items:
+            groups.setdefault(detected.get(i, (None, None))[0], []).append(i)
+
+        for language, items in groups.items():
+            kwargs = dict(transcribe_kwargs, language=language) if language is not None else transcribe_kwargs
+            for i, item in _transcribe_packed(pipeline, audios, items, regions, batch_size, callback, kwargs):
+                if i in detected:
+                    item = (item[0], item[1], dataclasses.replace(
+                        item[2], language=detected[i][0], language_probability=detected[i][1]))
+                results[i] = item
+
+    if vad_parameters:
+        # 管线会按窗口长度自行设置 max_speech_duration_s，并会修改传入的字典
+        transcribe_kwargs = dict(transcribe_kwargs, vad_filter=True, vad_parameters=dict(vad_parameters))
+    for i in long_items:
+        segments, info = pipeline.transcribe(
+            audios[i], batch_size=batch_size, word_timestamps=True, **transcribe_kwargs
+        )
+        words_list, sentences_list = collect_segments(segments, on_segment=callback(i))
+        results[i] = (words_list, sentences_list, info)
+
+    return results
+
+
+def _transcribe_packed(pipeline, audios, items, regions, batch_size, callback, transcribe_kwargs):
+    """把 items 中的短音频拼接成一条，regions[i] 中的各区域作为 clip 一次送入管线，按偏移拆回各段。"""
+    offsets, clips, speech, pos = [], [], [], 0
+    for i in items:
+        offsets.append(pos / WHISPER_SAMPLE_RATE)
+        clips.extend({"start": (pos + start) / WHISPER_SAMPLE_RATE, "end": (pos + end) / WHISPER_SAMPLE_RATE}
+                     for start, end in regions[i])
+        speech.append(sum(end - start for start, end in regions[i]) / WHISPER_SAMPLE_RATE)
+        pos += len(audios[i])
+
+    per_item = [([], []) for _ in items]
+    info = None
+    if clips:
+        packed = np.concatenate([audios[i] for i in items]).astype(np.float32, copy=False)
+        segments, info = pipeline.transcribe(
+            packed, clip_timestamps=clips, batch_size=batch_size, word_timestamps=True, **transcribe_kwargs
+        )
+        callbacks = [callback(i) for i in items]
+        for segment in segments:
+            midpoint = (segment.start + segment.end) / 2
+            slot = max(bisect.bisect_right(offsets, midpoint) - 1, 0)
+            collect_segments([segment], offset=offsets[slot], on_segment=callbacks[slot],
+                             words_list=per_item[slot][0], sentences_list=per_item[slot][1])
+    for slot, i in enumerate(items):
+        duration = len(audios[i]) / WHISPER_SAMPLE_RATE
+        if info is not None:
+            item_info = with_durations(info, duration, speech[slot])
+        else:
+            # VAD 在这些短音频中都没有检测到语音，没有调用管线
+            item_info = SimpleNamespace(language=None, language_probability=None,
+                                        duration=duration, duration_after_vad=0.0)
+        yield i, (per_item[slot][0], per_item[slot][1], item_info)
+
+
+def transcribe_chunked_parallel(model_pool, audio, chunks, on_segment_factory=None, **transcribe_kwargs):
+    """
+    按 chunks [(start_sample, end_sample), ...] 把长音频分窗，多个线程并行识别，
+    每个线程从 model_pool (queue.Queue) 取用独占的模型实例。
+    结果按原时间轴合并，返回 (words_list, sentences_list, info)，info 的时长为整条音频和各窗口 VAD 后时长之和。
+    on_segment_factory(index) 为第 index 个窗口返回 on_segment 回调，回调可能在工作线程中调用。
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def run(indexed_chunk):
+        index, (start, end) = indexed_chunk
+        on_segment = on_segment_factory(index) if on_segment_factory is not None else None
+        model = model_pool.get()
+        try:
+            segments, info = model.transcribe(audio[start:end], word_timestamps=True, **transcribe_kwargs)
+            words_list, sentences_list = collect_segments(
+                segments, offset=-start / WHISPER_SAMPLE_RATE, on_segment=on_segment
+            )
+        finally:
+            model_pool.put(model)
+        return words_list, sentences_list, info
+
+    with ThreadPoolExecutor(max_workers=model_pool.qsize()) as executor:
+        parts = list(executor.map(run, enumerate(chunks)))
+
+    words_list, sentences_list = [], []
+    for part_words, part_sentences, _ in parts:
+        words_list.extend(part_words)
+        sentences_list.extend(part_sentences)
+    info = with_durations(parts[0][2], len(audio) / WHISPER_SAMPLE_RATE,
+                          sum(part_info.duration_after_vad for _, _, part_info in parts))
+    return words_list, sentences_list, info
@@ -1,6 +1,26 @@
-from .asr_nodes import ASRMW
+import time
+
+_import_start = time.perf_counter()
+
+from .asr_nodes import ASRMW, preload_models
 from .color_picker import ColorPickerMW
 from .subtitles2video import StaticSubtitlesToVideoMW, DynamicSubtitlesToVideoMW
+from .subtitle_export import SubtitleExportMW, BurnSubtitlesMW
+from .MW_utils.config import env_bool, env_int, env_str
+from .MW_utils.text_models import warm_up as _warm_up_text_models
+
+_import_ms = (time.perf_counter() - _import_start) * 1000
+_import_budget_ms = env_int("MW_ASR_IMPORT_BUDGET_MS", 100)
+if _import_ms > _import_budget_ms:
+    print(f"[ComfyUI_ASR] 节点加载耗时 {_import_ms:.0f} ms，超出预算 {_import_budget_ms} ms")
+else:
+    print(f"[ComfyUI_ASR] 节点加载耗时 {_import_ms:.0f} ms (预算 {_import_budget_ms} ms)")
+
+if env_bool("MW_ASR_WARMUP_TEXT_MODELS"):
+    _warm_up_text_models()
+
+if env_str("MW_ASR_PRELOAD_MODELS"):
+    preload_models()
 
 
 
@@ -9,6 +29,8 @@ NODE_CLASS_MAPPINGS = {
     "ColorPickerMW": ColorPickerMW,
     "StaticSubtitlesToVideoMW": StaticSubtitlesToVideoMW,
     "DynamicSubtitlesToVideoMW": DynamicSubtitlesToVideoMW,
+    "SubtitleExportMW": SubtitleExportMW,
+    "BurnSubtitlesMW": BurnSubtitlesMW,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
@@ -16,6 +38,8 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "ColorPickerMW": "极简颜色选择器",
     "StaticSubtitlesToVideoMW": "视频添加静态字幕",
     "DynamicSubtitlesToVideoMW": "视频添加动态字幕",
+    "SubtitleExportMW": "导出字幕文件",
+    "BurnSubtitlesMW": "ffmpeg 烧录字幕",
 }
 
 WEB_DIRECTORY = "./web"
@@ -1,20 +1,30 @@
 import folder_paths
 import os
 import tempfile
-import torchaudio
+import queue
 from typing import Optional
-from faster_whisper import WhisperModel
 import torch
-import langid
-import jieba
-import re
-# from comfy.utils import ProgressBar
-from .MW_utils.hf_download import download_model_with_snapshot
+import threading
+import time
+from comfy.utils import ProgressBar
+import comfy.model_management
+from .MW_utils.model_store import ensure_model
+from .MW_utils.audio_utils import WHISPER_SAMPLE_RATE, waveform_to_whisper_array, split_on_silence
+from .MW_utils.model_cache import create_model_cache, dir_size_bytes
+from .MW_utils.result_cache import ResultCache
+from .MW_utils.config import env_int, env_str
+from .MW_utils.profiling import NO_PROFILER, StageProfiler
+from .MW_utils.timestamps import TIMESTAMPS_TYPE, TimestampTrack, convert_to_string
+from .MW_utils.text_models import detect_language, normalize_language, set_jieba_cache_dir
+from .MW_utils.sentence_align import create_custom_sentences
+from .MW_utils.transcription import collect_segments, summarize_info, transcribe_batched, transcribe_chunked_parallel
 
 
 models_dir = folder_paths.models_dir
 model_path = os.path.join(models_dir, "TTS")
 cache_dir = folder_paths.get_temp_directory()
+set_jieba_cache_dir(os.path.join(folder_paths.get_user_directory(), "asr_mw", "jieba"))
+result_cache_dir = env_str("MW_ASR_RESULT_CACHE_DIR", os.path.join(folder_paths.get_user_directory(), "asr_mw", "result_cache"))
 
 def cache_audio_tensor(
     cache_dir,
@@ -32,6 +42,7 @@ def cache_audio_tensor(
         ) as tmp_file:
             temp_filepath = tmp_file.name
         
+        import torchaudio
         torchaudio.save(temp_filepath, audio_tensor, sample_rate)
 
         return temp_filepath
@@ -39,114 +50,172 @@ def cache_audio_tensor(
         raise Exception(f"Error caching audio tensor: {e}")
 
 
-PUNCTUATION = "＂＃＄％＆＇（）＊＋，－／：；＜＝＞＠［＼］＾＿｀｛｜｝～｟｠｢｣､、〃『』【】〖〗〘〙〚〛〜〝〞〟–—‘’‛„‟…‧﹏." \
-              "!?(),;:[]{}<>\"+-=&^*%$#@/" \
-              "。？！，、；：“”‘'《》〈〉「」〔〕——·~`-"
+MODEL_CACHE = create_model_cache()
+RESULT_CACHE = ResultCache(result_cache_dir, env_int("MW_ASR_RESULT_CACHE_MB", 1024) * 1024 * 1024)
+
+COMPUTE_TYPES = ["default", "auto", "int8", "int8_float32", "int8_float16", "int8_bfloat16", "float16", "bfloat16", "float32"]
+
+MODEL_FILES = ["config.json", "model.bin", "tokenizer.json", "preprocessor_config.json", "vocabulary.json"]
+
+def prepare_model_dir(repo_id):
+    model_asr = os.path.join(model_path, repo_id.split("/")[-1])
+    return ensure_model(repo_id, model_asr, MODEL_FILES)
+
+def warm_up_model(model, seconds=1.0):
+    """用一小段静音做一次识别，触发算子初始化 (CUDA 内核、内存分配等)。"""
+    import numpy as np
+    start = time.perf_counter()
+    segments, _ = model.transcribe(np.zeros(int(WHISPER_SAMPLE_RATE * seconds), dtype=np.float32),
+                                   beam_size=1, word_timestamps=True, condition_on_previous_text=False)
+    for _ in segments:
+        pass
+    print(f"ASR model warm-up took {time.perf_counter() - start:.2f} s")
+
+def load_whisper_model(repo_id, device, compute_type="default", cpu_threads=0, num_workers=1, warm_up=False,
+                       profiler=NO_PROFILER):
+    key = (repo_id, device, compute_type, cpu_threads, num_workers)
+
+    # 检查后到 MODEL_CACHE.get 之间缓存项可能被淘汰 (例如预加载线程腾出空间)，此时由 loader 自行准备模型目录
+    model_asr, size_bytes = None, 0
+    if key not in MODEL_CACHE:
+        with profiler.stage("model_check"):
+            model_asr = prepare_model_dir(repo_id)
+            size_bytes = dir_size_bytes(model_asr)
+
+    def loader():
+        from faster_whisper import WhisperModel
+        model_dir = model_asr or prepare_model_dir(repo_id)
+        print(f"Loading ASR model from: {model_dir}")
+        model = WhisperModel(model_dir, device=device, compute_type=compute_type,
+                             cpu_threads=cpu_threads, num_workers=num_workers)
+        if warm_up:
+            warm_up_model(model)
+        return model
+
+    with profiler.stage("model_load"):
+        model = MODEL_CACHE.get(key, loader, size_bytes=size_bytes, device=device)
+    print(f"ASR model cache: {MODEL_CACHE.stats()}")
+    return key, model
+
+def load_whisper_model_pool(repo_id, device, workers, compute_type="default", cpu_threads=0, profiler=NO_PROFILER):
+    """并行分段识别用: 每个 worker 一个独立模型实例，整组作为一个缓存项。"""
+    if cpu_threads <= 0 and device == "cpu":
+        cpu_threads = max((os.cpu_count() or workers) // workers, 1)
+    key = (repo_id, device, compute_type, cpu_threads, "pool", workers)
+
+    # 检查后到 MODEL_CACHE.get 之间缓存项可能被淘汰 (例如预加载线程腾出空间)，此时由 loader 自行准备模型目录
+    model_asr, size_bytes = None, 0
+    if key not in MODEL_CACHE:
+        with profiler.stage("model_check"):
+            model_asr = prepare_model_dir(repo_id)
+            size_bytes = dir_size_bytes(model_asr) * workers
+
+    def loader():
+        from faster_whisper import WhisperModel
+        model_dir = model_asr or prepare_model_dir(repo_id)
+        print(f"Loading {workers} ASR model instances from: {model_dir}")
+        return [WhisperModel(model_dir, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+                for _ in range(workers)]
+
+    with profiler.stage("model_load"):
+        models = MODEL_CACHE.get(key, loader, size_bytes=size_bytes, device=device)
+    print(f"ASR model cache: {MODEL_CACHE.stats()}")
+    model_pool = queue.Queue()
+    for model in models:
+        model_pool.put(model)
+    return key, model_pool
+
+def resolve_preload_models(names):
+    """把逗号分隔的模型列表 (完整仓库名或仓库名最后一段) 解析为 ASRMW.models_list 中的仓库名。"""
+    repo_ids = []
+    for name in names.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        matches = [m for m in ASRMW.models_list if name in (m, m.split("/")[-1])]
+        if not matches:
+            print(f"MW_ASR_PRELOAD_MODELS: 未知模型 {name}，可选: {', '.join(ASRMW.models_list)}")
+            continue
+        if matches[0] not in repo_ids:
+            repo_ids.append(matches[0])
+    return repo_ids
+
+def preload_models(names=None, compute_type=None):
+    """
+    在后台线程中按 MW_ASR_PRELOAD_MODELS 依次加载模型并用静音预热，放入模型缓存，不阻塞 ComfyUI 启动。
+    缓存键与节点默认参数 (CPU线程数 0、解码并发数 1) 一致，计算精度由 MW_ASR_PRELOAD_COMPUTE_TYPE 指定；
+    预加载进行中运行节点时，节点会等待这次加载完成而不是重复加载。
+    """
+    repo_ids = resolve_preload_models(env_str("MW_ASR_PRELOAD_MODELS") if names is None else names)
+    compute_type = compute_type or env_str("MW_ASR_PRELOAD_COMPUTE_TYPE", "default")
+    if not repo_ids:
+        return None
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    def run():
+        for repo_id in repo_ids:
+            start = time.perf_counter()
+            try:
+                load_whisper_model(repo_id, device, compute_type=compute_type, warm_up=True)
+                print(f"[ComfyUI_ASR] 预加载模型 {repo_id} 完成，耗时 {time.perf_counter() - start:.1f} s")
+            except Exception as e:
+                print(f"[ComfyUI_ASR] 预加载模型 {repo_id} 失败: {e}")
+
+    thread = threading.Thread(target=run, name="asr-mw-preload", daemon=True)
+    thread.start()
+    return thread
+
+def skipped_seconds(info):
+    """VAD 跳过的非语音时长 (秒)；旧的缓存结果没有记录 VAD 后时长时为 0。"""
+    if not info:
+        return 0.0
+    return max(info["duration"] - info.get("duration_after_vad", info["duration"]), 0.0)
+
+class TranscriptionProgress:
+    """逐段更新 ComfyUI 进度条、响应中断，并可把每段结果立即追加写入中间结果文件。"""
+    STEPS = 1000
+
+    def __init__(self, total_seconds, partial_path=None):
+        self.pbar = ProgressBar(self.STEPS)
+        self.total = max(total_seconds, 1e-6)
+        self.done = 0.0
+        self.lock = threading.Lock()
+        self.partial_file = None
+        if partial_path:
+            os.makedirs(os.path.dirname(partial_path), exist_ok=True)
+            self.partial_file = open(partial_path, "a", encoding="utf-8")
+            print(f"Writing partial transcript to: {partial_path}")
+
+    def stream(self, start=0.0):
+        last_end = [start]
+
+        def on_segment(sentence):
+            comfy.model_management.throw_exception_if_processing_interrupted()
+            with self.lock:
+                if sentence[1] > last_end[0]:
+                    self.done += sentence[1] - last_end[0]
+                    last_end[0] = sentence[1]
+                self.pbar.update_absolute(min(int(self.done / self.total * self.STEPS), self.STEPS))
+                if self.partial_file is not None:
+                    self.partial_file.write(convert_to_string([sentence]) + "\n")
+                    self.partial_file.flush()
+
+        return on_segment
+
+    def finish_item(self, seconds):
+        """一条音频识别完成后把进度补齐到该音频的结尾。"""
+        with self.lock:
+            self.done = max(self.done, seconds)
+            self.pbar.update_absolute(min(int(self.done / self.total * self.STEPS), self.STEPS))
+
+    def close(self):
+        if self.partial_file is not None:
+            self.partial_file.close()
 
-def convert_to_string(lst):
-    return "\n".join([f"({x[0]}, {x[1]}) {x[2]}" for x in lst])
-
-def is_punctuation(text):
-    return all(char in PUNCTUATION for char in text.strip())
-
-def create_custom_sentences(words_list, sentences_list, max_len, lang="zh"):
-    full_text = "".join([s[2] for s in sentences_list])
-    if not full_text: return []
-    custom_sentences_list = []
-    global_word_cursor = 0
-
-    for sent_start, sent_end, sent_text in sentences_list:
-        sentence_words = []
-        norm_target_text = re.sub(r'[\s' + re.escape(PUNCTUATION) + r']+', '', sent_text)
-        reconstructed_text = ""
-        temp_cursor = global_word_cursor
-        while temp_cursor < len(words_list) and len(reconstructed_text) < len(norm_target_text):
-            word_content = words_list[temp_cursor][2]
-            sentence_words.append(words_list[temp_cursor])
-            reconstructed_text += re.sub(r'[\s' + re.escape(PUNCTUATION) + r']+', '', word_content)
-            temp_cursor += 1
-        global_word_cursor = temp_cursor
-        if not sentence_words: continue
-
-        if lang == "zh":
-            local_word_cursor = 0
-            jieba_words = [w.strip() for w in jieba.lcut(sent_text) if w.strip()]
-            jieba_cursor = 0
-            
-            while jieba_cursor < len(jieba_words):
-                
-                core_words = []
-                current_len = 0
-                while jieba_cursor < len(jieba_words):
-                    token = jieba_words[jieba_cursor]
-                    if is_punctuation(token):
-                        break 
-                    if current_len + len(token) > max_len and core_words:
-                        break
-                    core_words.append(token)
-                    current_len += len(token)
-                    jieba_cursor += 1
-                
-                if not core_words:
-                    if jieba_cursor < len(jieba_words) and is_punctuation(jieba_words[jieba_cursor]):
-                        if custom_sentences_list:
-                            custom_sentences_list[-1][2] += jieba_words[jieba_cursor]
-                        jieba_cursor += 1
-                    continue
-                
-                chunk_text = "".join(core_words)
-                chunk_len = len(chunk_text)
-                
-                chars_consumed = 0
-                start_idx = local_word_cursor
-                end_idx = local_word_cursor
-                for i in range(start_idx, len(sentence_words)):
-                    chars_consumed += len(sentence_words[i][2])
-                    end_idx = i
-                    if chars_consumed >= chunk_len: break
-                
-                start_time, end_time = -1, -1
-                if start_idx <= end_idx:
-                    start_time = sentence_words[start_idx][0]
-                    end_time = sentence_words[end_idx][1]
-                    local_word_cursor = end_idx + 1
-                
-                while jieba_cursor < len(jieba_words) and is_punctuation(jieba_words[jieba_cursor]):
-                    chunk_text += jieba_words[jieba_cursor]
-                    jieba_cursor += 1 
-                
-                if start_time != -1:
-                    custom_sentences_list.append([start_time, end_time, chunk_text])
-        else: 
-            timed_tokens = [[s, e, w.strip()] for s, e, w in sentence_words]
-            if not timed_tokens: continue
-            current_chunk_tokens = []
-            for token_data in timed_tokens:
-                token_text = token_data[2]
-                if not token_text: continue
-                if not current_chunk_tokens and is_punctuation(token_text) and custom_sentences_list:
-                    last_item = custom_sentences_list[-1]
-                    last_item[1] = token_data[1]
-                    last_item[2] += (" " + token_text)
-                    continue
-                if len(" ".join(t[2] for t in current_chunk_tokens)) + len(token_text) + 1 > max_len and current_chunk_tokens:
-                    chunk_text = " ".join(t[2] for t in current_chunk_tokens)
-                    custom_sentences_list.append([current_chunk_tokens[0][0], current_chunk_tokens[-1][1], chunk_text])
-                    current_chunk_tokens = [token_data]
-                else:
-                    current_chunk_tokens.append(token_data)
-            if current_chunk_tokens:
-                chunk_text = " ".join(t[2] for t in current_chunk_tokens)
-                custom_sentences_list.append([current_chunk_tokens[0][0], current_chunk_tokens[-1][1], chunk_text])
-
-    return custom_sentences_list
-
-MODEL_CACHE = None
 class ASRMW:
     models_list = ["k1nto/Belle-whisper-large-v3-zh-punct-ct2", "CWTchen/Belle-whisper-large-v3-zh-punct-ct2-float32", "erik-svensson-cm/whisper-large-v3-ct2"]
     def __init__(self):
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model_name = None
 
     @classmethod
     def INPUT_TYPES(s):
@@ -155,14 +224,31 @@ class ASRMW:
                 "模型": (s.models_list, {"default": s.models_list[0], "tooltip": "选择ASR模型, 中文用 zh 模型"}),
                 "音频": ("AUDIO", {"tooltip": "输入音频文件"}),
                 "每句最大长度": ("INT", {"default": 20, "min": 1, "max": 1000, "tooltip": "中文按字数计算，英文按字母数计算"}),
-                "卸载模型": ("BOOLEAN", {"default": True, "tooltip": "运行后卸载模型以释放显存"}),  
+                "卸载模型": ("BOOLEAN", {"default": True, "tooltip": "运行后将该模型移出模型缓存以释放显存"}),  
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xFFFFFFFFFFFFFFFF, "step": 1, "tooltip": "随机种子"}),
             },
-            "optional": {},
+            "optional": {
+                "批处理大小": ("INT", {"default": 8, "min": 1, "max": 64, "step": 1, "tooltip": "音频批次含多条音频时一次送入模型的片段数, 1 为逐条识别"}),
+                "计算精度": (COMPUTE_TYPES, {"default": "default", "tooltip": "模型计算精度, CPU 推荐 int8 / int8_float32, default 为模型保存时的精度"}),
+                "CPU线程数": ("INT", {"default": 0, "min": 0, "max": 256, "step": 1, "tooltip": "CPU 推理线程数, 0 为自动"}),
+                "解码并发数": ("INT", {"default": 1, "min": 1, "max": 64, "step": 1, "tooltip": "模型的并发 worker 数, 多线程同时调用识别时可真正并行"}),
+                "长音频并行": ("BOOLEAN", {"default": False, "tooltip": "长音频在静音处切分为多个窗口, 由多个 worker 并行识别后合并时间轴"}),
+                "并行分段秒数": ("INT", {"default": 300, "min": 30, "max": 3600, "step": 10, "tooltip": "长音频并行时每个窗口的最大秒数"}),
+                "并行worker数": ("INT", {"default": 4, "min": 1, "max": 64, "step": 1, "tooltip": "长音频并行时的 worker 数, 每个 worker 持有一个模型实例"}),
+                "保存中间结果": ("BOOLEAN", {"default": False, "tooltip": "识别过程中把每段结果实时写入 output/asr_partial 目录, 中断后已识别部分不会丢失"}),
+                "使用结果缓存": ("BOOLEAN", {"default": True, "tooltip": "相同音频和识别参数直接读取磁盘缓存的识别结果, 只重新断句"}),
+                "VAD过滤": ("BOOLEAN", {"default": False, "tooltip": "用 Silero VAD 检测语音区域, 只识别有语音的部分, 时间戳仍对应原音频; 适合静音多的会议、直播录音, 可减少解码时间和静音处的幻听"}),
+                "VAD阈值": ("FLOAT", {"default": 0.5, "min": 0.05, "max": 0.95, "step": 0.05, "tooltip": "语音概率高于该值才算语音, 调高可跳过更多噪声, 过高会漏掉轻声"}),
+                "最短语音毫秒": ("INT", {"default": 0, "min": 0, "max": 10000, "step": 50, "tooltip": "短于该时长的语音片段丢弃, 0 为全部保留"}),
+                "最短静音毫秒": ("INT", {"default": 2000, "min": 0, "max": 10000, "step": 100, "tooltip": "静音持续超过该时长才切开语音片段并跳过, 调小可跳过更多短停顿"}),
+                "语音填充毫秒": ("INT", {"default": 400, "min": 0, "max": 2000, "step": 50, "tooltip": "每个语音片段前后保留的余量, 避免切掉字头字尾"}),
+                "性能统计": ("BOOLEAN", {"default": False, "tooltip": "记录各阶段耗时、CPU 时间和峰值内存, 打印汇总并从 性能统计 输出 JSON; 也可用环境变量 MW_ASR_PROFILE=1 对所有节点开启"}),
+            },
         }
 
-    RETURN_TYPES = ("STRING", "STRING", "STRING",)
-    RETURN_NAMES = ("纯文本", "时间戳单词", "时间戳句子",)
+    RETURN_TYPES = ("STRING", "STRING", "STRING", TIMESTAMPS_TYPE, TIMESTAMPS_TYPE, "STRING",)
+    RETURN_NAMES = ("纯文本", "时间戳单词", "时间戳句子", "单词时间戳数据", "句子时间戳数据", "性能统计",)
+    OUTPUT_IS_LIST = (True, True, True, True, True, False,)
     FUNCTION = "run_inference"
     CATEGORY = "🎤MW/MW-ASR"
 
@@ -173,92 +259,197 @@ class ASRMW:
         每句最大长度=20,
         卸载模型=True,
         seed=0,
+        批处理大小=8,
+        计算精度="default",
+        CPU线程数=0,
+        解码并发数=1,
+        长音频并行=False,
+        并行分段秒数=300,
+        并行worker数=4,
+        保存中间结果=False,
+        使用结果缓存=True,
+        性能统计=False,
+        VAD过滤=False,
+        VAD阈值=0.5,
+        最短语音毫秒=0,
+        最短静音毫秒=2000,
+        语音填充毫秒=400,
     ):
+        profiler = StageProfiler("ASRMW", 性能统计)
+        vad_parameters = None
+        if VAD过滤:
+            vad_parameters = {
+                "threshold": VAD阈值, "min_speech_duration_ms": 最短语音毫秒,
+                "min_silence_duration_ms": 最短静音毫秒, "speech_pad_ms": 语音填充毫秒,
+            }
         if seed != 0:
             torch.manual_seed(seed) 
             torch.cuda.manual_seed_all(seed)
 
-        audio_file = cache_audio_tensor(
-            cache_dir,
-            音频["waveform"].squeeze(0),
-            音频["sample_rate"],
-        )
-
-        global MODEL_CACHE
-        if MODEL_CACHE is None or self.model_name != 模型:
-            model_asr = os.path.join(model_path, 模型.split("/")[-1])
-            allow_patterns = ["config.json", "model.bin", "tokenizer.json", "preprocessor_config.json", "vocabulary.json"]
-            download_model_with_snapshot(repo_id=模型, local_dir=model_asr, allow_patterns=allow_patterns)
-            print(f"Loading ASR model from: {model_asr}")
-            
-            if not os.path.exists(model_asr):
-                raise FileNotFoundError(f"Model file not found: {model_asr}. Please check paths.")
-            MODEL_CACHE = WhisperModel(model_asr, device=self.device)
-            self.model_name = 模型
-
-        segments, info = MODEL_CACHE.transcribe(audio_file, word_timestamps=True)
-        words_list = []
-        sentences_list = []
-        for segment in segments:
-            for i in segment.words:
-                words_list.append([round(i.start, 2), round(i.end, 2), i.word.strip()])
-            sentences_list.append([round(segment.start, 2), round(segment.end, 2), segment.text.strip()])
-        
+        waveforms = 音频["waveform"]
+        if waveforms.dim() == 2:
+            waveforms = waveforms.unsqueeze(0)
+
+        results = [None] * len(waveforms)
+        cache_keys = [{} for _ in waveforms]
+        if 使用结果缓存:
+            cache_params = {"model": 模型, "compute_type": 计算精度, "seed": seed, "word_timestamps": True}
+            if vad_parameters:
+                cache_params["vad"] = vad_parameters
+            # 键中的 mode 是实际使用的解码方式；批次中只剩一条未命中时会逐条识别，所以批处理时也查找 serial 的结果
+            if 长音频并行:
+                lookup_modes = [f"parallel-{并行分段秒数}"]
+            elif len(waveforms) > 1 and 批处理大小 > 1:
+                lookup_modes = ["batched", "serial"]
+            else:
+                lookup_modes = ["serial"]
+            with profiler.stage("result_cache"):
+                for index, waveform in enumerate(waveforms):
+                    keys = RESULT_CACHE.make_keys(waveform, 音频["sample_rate"],
+                                                  [dict(cache_params, mode=mode) for mode in lookup_modes])
+                    cache_keys[index] = dict(zip(lookup_modes, keys))
+                    for key in keys:
+                        cached = RESULT_CACHE.get(key)
+                        if cached is not None:
+                            results[index] = (cached["words"], cached["sentences"], cached["info"])
+                            break
+            hits = sum(r is not None for r in results)
+            if hits:
+                print(f"ASR result cache: {hits}/{len(results)} hit(s)")
+
+        pending = [index for index, result in enumerate(results) if result is None]
+        model_key = None
+        if pending:
+            with profiler.stage("audio_convert"):
+                audios = [self.to_whisper_audio(waveforms[index], 音频["sample_rate"]) for index in pending]
+            model_key, transcribed = self.transcribe(
+                audios, 模型, 批处理大小, 计算精度, CPU线程数, 解码并发数,
+                长音频并行, 并行分段秒数, 并行worker数, 保存中间结果, vad_parameters, profiler,
+            )
+            if 长音频并行:
+                mode = f"parallel-{并行分段秒数}"
+            else:
+                mode = "batched" if len(pending) > 1 and 批处理大小 > 1 else "serial"
+            for index, (words_list, sentences_list, info) in zip(pending, transcribed):
+                results[index] = (words_list, sentences_list, info)
+                if 使用结果缓存:
+                    with profiler.stage("result_cache"):
+                        RESULT_CACHE.put(cache_keys[index][mode], {"words": words_list, "sentences": sentences_list, "info": info})
+
+        纯文本_list, words_str_list, sentences_str_list, words_track_list, sentences_track_list = [], [], [], [], []
+        for words_list, sentences_list, info in results:
+            with profiler.stage("language_id"):
+                lang, lang_prob = self.resolve_language(sentences_list, info)
+            with profiler.stage("alignment"):
+                纯文本, custom_sentences_list = self.postprocess(words_list, sentences_list, 每句最大长度, lang)
+            with profiler.stage("format"):
+                纯文本_list.append(纯文本)
+                words_str_list.append(convert_to_string(words_list))
+                sentences_str_list.append(convert_to_string(custom_sentences_list))
+                words_track_list.append(TimestampTrack.from_list(words_list, lang, lang_prob))
+                sentences_track_list.append(TimestampTrack.from_list(custom_sentences_list, lang, lang_prob))
+
+        if 卸载模型 and model_key is not None:
+            MODEL_CACHE.evict(model_key)
+
+        audio_seconds = sum(waveform.shape[-1] for waveform in waveforms) / 音频["sample_rate"]
+        extra = {"model": 模型, "audio_seconds": audio_seconds, "items": len(waveforms), "transcribed": len(pending)}
+        if vad_parameters:
+            extra["vad"] = vad_parameters
+            extra["vad_skipped_seconds"] = sum(skipped_seconds(info) for _, _, info in results)
+        metrics = profiler.finish(**extra)
+        return (纯文本_list, words_str_list, sentences_str_list, words_track_list, sentences_track_list, metrics)
+
+    @staticmethod
+    def to_whisper_audio(waveform, sample_rate):
+        try:
+            return waveform_to_whisper_array(waveform, sample_rate)
+        except Exception as e:
+            print(f"In-memory audio conversion failed ({e}), falling back to temp WAV file.")
+            from faster_whisper.audio import decode_audio
+            return decode_audio(cache_audio_tensor(cache_dir, waveform, sample_rate))
+
+    def transcribe(self, audios, 模型, 批处理大小, 计算精度, CPU线程数, 解码并发数,
+                   长音频并行, 并行分段秒数, 并行worker数, 保存中间结果, vad_parameters=None, profiler=NO_PROFILER):
+        durations = [len(a) / WHISPER_SAMPLE_RATE for a in audios]
+        partial_path = None
+        if 保存中间结果:
+            partial_path = os.path.join(
+                folder_paths.get_output_directory(), "asr_partial", f"asr_partial_{time.strftime('%Y%m%d_%H%M%S')}.txt"
+            )
+        progress = TranscriptionProgress(sum(durations), partial_path)
+
+        try:
+            if 长音频并行:
+                model_key, model_pool = load_whisper_model_pool(
+                    模型, self.device, 并行worker数, compute_type=计算精度, cpu_threads=CPU线程数, profiler=profiler
+                )
+                results = []
+                for audio in audios:
+                    with profiler.stage("silence_split"):
+                        chunks = split_on_silence(audio, max_chunk_s=并行分段秒数)
+                    print(f"Long-audio mode: {len(chunks)} chunk(s), {model_pool.qsize()} worker(s)")
+                    with profiler.stage("transcribe"):
+                        results.append(transcribe_chunked_parallel(
+                            model_pool, audio, chunks,
+                            on_segment_factory=lambda k: progress.stream(chunks[k][0] / WHISPER_SAMPLE_RATE),
+                            vad_filter=vad_parameters is not None, vad_parameters=vad_parameters,
+                        ))
+            else:
+                model_key, model = load_whisper_model(
+                    模型, self.device, compute_type=计算精度, cpu_threads=CPU线程数, num_workers=解码并发数,
+                    profiler=profiler,
+                )
+                with profiler.stage("transcribe"):
+                    if len(audios) > 1 and 批处理大小 > 1:
+                        results = transcribe_batched(
+                            model, audios, batch_size=批处理大小, on_segment_factory=lambda k: progress.stream(),
+                            vad_parameters=vad_parameters,
+                        )
+                    else:
+                        results = []
+                        for index, audio in enumerate(audios):
+                            segments, info = model.transcribe(audio, word_timestamps=True,
+                                                              vad_filter=vad_parameters is not None,
+                                                              vad_parameters=vad_parameters)
+                            words_list, sentences_list = collect_segments(segments, on_segment=progress.stream())
+                            progress.finish_item(sum(durations[:index + 1]))
+                            results.append((words_list, sentences_list, info))
+        finally:
+            progress.close()
+
+        results = [
+            (words_list, sentences_list, summarize_info(info, duration))
+            for (words_list, sentences_list, info), duration in zip(results, durations)
+        ]
+        if vad_parameters is not None:
+            for index, (_, _, info) in enumerate(results):
+                skipped = skipped_seconds(info)
+                print(f"VAD: audio {index}: skipped {skipped:.1f}s of {info['duration']:.1f}s "
+                      f"({skipped / max(info['duration'], 1e-6):.0%}) as non-speech")
+        return model_key, results
+
+    @staticmethod
+    def resolve_language(sentences_list, info):
+        """优先使用 Whisper 检测到的语言 (粤语等汉字文本归为 zh)，缺失时 (如旧的缓存结果) 才对文本样本做语言识别。"""
+        if info and info.get("language"):
+            return normalize_language(info["language"]), info.get("language_probability")
+        lang, prob = detect_language(" ".join([i[2] for i in sentences_list]))
+        return lang, prob
+
+    @staticmethod
+    def postprocess(words_list, sentences_list, max_len, lang):
         texts = " ".join([i[2] for i in sentences_list])
-        lang, _ = langid.classify(texts)
 
         if lang == "zh":
             纯文本 = "".join([i[2] for i in sentences_list])
         else:
             纯文本 = texts
 
-        custom_sentences_list = []
         custom_sentences_list = create_custom_sentences(
                 words_list,
                 sentences_list,
-                max_len=每句最大长度,
+                max_len=max_len,
                 lang=lang,
             )
-        
-        if 卸载模型:
-            MODEL_CACHE = None
-            torch.cuda.empty_cache()
-
-        return (纯文本, convert_to_string(words_list), convert_to_string(custom_sentences_list))
-
-
-
-
-
-    
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-    
-
-
-
-
-
-    
-
+        return 纯文本, custom_sentences_list
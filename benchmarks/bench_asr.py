@@ -0,0 +1,274 @@
+"""
+ASR 吞吐基准测试: 直接调用 ASRMW.run_inference，用节点自身的性能统计分阶段计时，报告实时率 (RTF)、各阶段耗时和峰值内存，
+可输出 JSON 并与基线 JSON 比较，用于升级依赖或修改代码后的回归检查。完全离线，CPU 即可运行。
+
+模型模式:
+  stub   桩模型，按音频时长直接生成逐词结果，只测量纯 Python 阶段 (断句、格式化、语言识别)；
+         加 --stub-no-language 时桩模型不返回语言，节点改为对文本做 langid 语言识别 (结果中 mode 记为 stub-no-language)
+  tiny   现场生成的极小随机权重 CT2 Whisper 模型 (见 tiny_whisper.py)，完整走 faster-whisper 流程
+  model  --model-dir 指定的本地 CT2 模型目录，例如 ComfyUI/models/TTS/Belle-whisper-large-v3-zh-punct-ct2
+
+    python benchmarks/bench_asr.py --mode stub --durations 60,600,3600
+    python benchmarks/bench_asr.py --mode tiny --durations 10,60 --batch-sizes 1,4 --json tiny.json
+    python benchmarks/bench_asr.py --mode tiny --durations 10,60 --batch-sizes 1,4 --compare tiny.json
+
+每个 (时长, 批大小) 组合在独立子进程中运行，峰值内存互不影响；--repeat N 时取 N 次中总 RTF 最小的一次。
+批大小 b 表示一次输入 b 条同样时长的音频，作为节点的 批处理大小；b > 1 时走批处理管线 (stub 模式下逐条识别)。
+节点在 comfy_stubs 提供的桩模块下运行 (不需要 ComfyUI)，模型目录由 --mode 决定，不下载也不校验清单，不使用结果缓存。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+import comfy_stubs  # noqa: E402
+from MW_utils.audio_utils import WHISPER_SAMPLE_RATE  # noqa: E402
+from MW_utils.profiling import StageProfiler  # noqa: E402
+
+ZH_CHARS = "我们今天天气很好你是谁他在这里学习中文非常有意思的事情大家一起去公园玩"
+EN_WORDS = "the quick brown fox jumps over lazy dog hello world it's well-known data".split()
+
+
+def peak_rss_mb():
+    """进程峰值常驻内存 (MB)；Windows 上需要 psutil，缺失时返回 None。"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 1024 / 1024
+        except (ImportError, AttributeError):
+            return None
+
+
+def synthetic_audio(seconds, sample_rate, channels=2, seed=0):
+    """类语音的合成音频: 0.5~4 秒的调制谐波 "语句" 之间夹 0.2~2 秒静音。"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    audio = np.zeros(n, dtype=np.float32)
+    pos = 0
+    while pos < n:
+        pos += int(rng.uniform(0.2, 2.0) * sample_rate)
+        length = min(int(rng.uniform(0.5, 4.0) * sample_rate), n - pos)
+        if length <= 0:
+            break
+        t = np.arange(length) / sample_rate
+        f0 = rng.uniform(100, 250)
+        voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        envelope = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(2, 6) * t))
+        audio[pos:pos + length] = 0.1 * voiced * envelope + 0.01 * rng.standard_normal(length)
+        pos += length
+    return np.tile(audio, (channels, 1))
+
+
+class StubWhisperModel:
+    """
+    桩模型: transcribe() 按音频时长生成逐词结果 (约每秒 3 个词，每 5 秒一段)，接口与 WhisperModel 相同。
+    report_language=False 时 info 中不带语言，节点会走文本语言识别的回退路径。
+    """
+
+    def __init__(self, lang, report_language=True):
+        self.lang = lang
+        self.report_language = report_language
+        self.feature_extractor = SimpleNamespace(chunk_length=30)
+
+    def transcribe(self, audio, **kwargs):
+        duration = len(audio) / WHISPER_SAMPLE_RATE
+        info = SimpleNamespace(language=self.lang if self.report_language else None,
+                               language_probability=1.0 if self.report_language else None,
+                               duration=duration, duration_after_vad=duration)
+        return self._segments(duration), info
+
+    def _segments(self, duration):
+        rng = random.Random(int(duration))
+        sep = "" if self.lang == "zh" else " "
+        start = 0.0
+        while start < duration:
+            end = min(start + 5.0, duration)
+            words, t = [], start
+            while t + 0.3 <= end:
+                if self.lang == "zh":
+                    text = "".join(rng.choice(ZH_CHARS) for _ in range(rng.randint(1, 3)))
+                    punct = "，。！？、"
+                else:
+                    text = rng.choice(EN_WORDS)
+                    punct = ",.!?"
+                if rng.random() < 0.15:
+                    text += rng.choice(punct)
+                words.append(SimpleNamespace(start=t, end=t + 0.3, word=sep + text))
+                t += 0.33
+            yield SimpleNamespace(start=start, end=end, text=sep.join(w.word.strip() for w in words), words=words)
+            start = end
+
+
+def load_node(args, root):
+    """导入真实的 ASRMW 节点 (目录都在 root 下)，让它从 --mode 对应的模型加载，不下载也不校验清单。"""
+    comfy_stubs.install(root)
+    asr_nodes = comfy_stubs.import_node_module("asr_nodes")
+    if args.mode == "stub":
+        import faster_whisper
+        faster_whisper.WhisperModel = lambda *a, **kwargs: StubWhisperModel(args.lang, not args.stub_no_language)
+        model_dir = os.path.join(root, "models", "stub")
+        os.makedirs(model_dir, exist_ok=True)
+    else:
+        model_dir = args.model_dir
+    asr_nodes.prepare_model_dir = lambda repo_id: model_dir
+    node = asr_nodes.ASRMW()
+    node.device = "cpu"
+    return node
+
+
+def run_one(args, duration, batch_size):
+    """在当前进程中运行一个 (时长, 批大小) 组合，返回结果字典。"""
+    root = os.path.join(tempfile.gettempdir(), "mw_asr_bench")
+    node = load_node(args, root)
+    text_models = comfy_stubs.import_node_module("MW_utils.text_models")
+    profiler = StageProfiler("bench_asr", enabled=True)
+    with profiler.stage("text_models_init"):
+        text_models.get_jieba(), text_models.get_langid()
+
+    import torch
+    waveform = torch.from_numpy(np.stack([synthetic_audio(duration, args.sample_rate, seed=i) for i in range(batch_size)]))
+    batched = batch_size > 1 and args.mode != "stub"
+    outputs = node.run_inference(
+        args.mode, {"waveform": waveform, "sample_rate": args.sample_rate},
+        每句最大长度=args.max_len, 卸载模型=True, 批处理大小=batch_size if batched else 1,
+        计算精度=args.compute_type, CPU线程数=args.cpu_threads, 使用结果缓存=False, 性能统计=True,
+    )
+    metrics = json.loads(outputs[-1])
+
+    stages = dict(profiler.summary()["stages"], **metrics["stages"])
+    audio_seconds = duration * batch_size
+    processing = sum(v.get("wall_s", 0.0) for k, v in stages.items()
+                     if k not in ("model_check", "model_load", "text_models_init"))
+    return {
+        "mode": "stub-no-language" if args.mode == "stub" and args.stub_no_language else args.mode,
+        "duration_s": duration,
+        "batch_size": batch_size,
+        "batched": batched,
+        "audio_s": audio_seconds,
+        "words": sum(len(track) for track in outputs[3]),
+        "rtf_transcribe": stages["transcribe"]["wall_s"] / audio_seconds,
+        "rtf_total": processing / audio_seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": stages,
+    }
+
+
+def run_isolated(args, duration, batch_size):
+    cmd = [sys.executable, os.path.abspath(__file__), "--run-one", f"{duration},{batch_size}",
+           "--mode", args.mode, "--model-dir", args.model_dir or "", "--lang", args.lang,
+           "--compute-type", args.compute_type, "--cpu-threads", str(args.cpu_threads),
+           "--sample-rate", str(args.sample_rate), "--max-len", str(args.max_len)]
+    if args.stub_no_language:
+        cmd.append("--stub-no-language")
+    output = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_run(run):
+    stage_text = ", ".join(f"{k} {v['wall_s'] * 1000:.0f} ms" for k, v in run["stages"].items())
+    print(f"{run['mode']} {run['duration_s']:g}s x{run['batch_size']}: "
+          f"RTF {run['rtf_total']:.4f} (transcribe {run['rtf_transcribe']:.4f}), "
+          f"peak RSS {run['peak_rss_mb'] or 0:.0f} MB | {stage_text}")
+
+
+def compare(runs, baseline_path, threshold):
+    """与基线逐项比较 RTF 和各阶段耗时，返回超过阈值的回归项列表。"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["mode"], r["duration_s"], r["batch_size"]): r for r in json.load(f)["runs"]}
+    regressions = []
+    for run in runs:
+        base = baseline.get((run["mode"], run["duration_s"], run["batch_size"]))
+        if base is None:
+            continue
+        metrics = [("rtf_total", run["rtf_total"], base["rtf_total"])]
+        metrics += [(f"stages.{k}.wall_s", v["wall_s"], base["stages"].get(k, {}).get("wall_s"))
+                    for k, v in run["stages"].items()]
+        for name, value, old in metrics:
+            # 小于 5 ms 的阶段受计时噪声影响太大，不参与比较
+            if not old or max(value, old) < 0.005:
+                continue
+            change = value / old - 1
+            if change > threshold:
+                regressions.append(f"{run['mode']} {run['duration_s']:g}s x{run['batch_size']} {name}: "
+                                   f"{old:.4f} -> {value:.4f} (+{change:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["stub", "tiny", "model"], default="stub")
+    parser.add_argument("--model-dir", default="", help="model 模式的 CT2 模型目录；tiny 模式下为生成模型的目录 (默认临时目录)")
+    parser.add_argument("--durations", default="10,60,300", help="音频时长 (秒)，逗号分隔")
+    parser.add_argument("--batch-sizes", default="1,4", help="每次输入的音频条数，逗号分隔")
+    parser.add_argument("--lang", choices=["zh", "en"], default="zh", help="stub 模式生成的文本语言")
+    parser.add_argument("--stub-no-language", action="store_true",
+                        help="stub 模式的桩模型不返回语言，测量节点对文本做语言识别的回退路径")
+    parser.add_argument("--compute-type", default="default")
+    parser.add_argument("--cpu-threads", type=int, default=0)
+    parser.add_argument("--sample-rate", type=int, default=44100, help="合成音频的采样率 (会重采样到 16 kHz)")
+    parser.add_argument("--max-len", type=int, default=20, help="每句最大长度")
+    parser.add_argument("--repeat", type=int, default=1, help="每个组合运行的次数")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    parser.add_argument("--compare", help="与基线 JSON 比较，有回归时返回码为 1")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定回归的相对变慢比例")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        duration, batch_size = args.run_one.split(",")
+        print(json.dumps(run_one(args, float(duration), int(batch_size))))
+        return
+
+    if args.mode == "tiny":
+        from tiny_whisper import build_tiny_model
+        args.model_dir = build_tiny_model(args.model_dir or os.path.join(tempfile.gettempdir(), "mw_asr_tiny_whisper"))
+    elif args.mode == "model" and not os.path.isdir(args.model_dir):
+        parser.error("model 模式需要用 --model-dir 指定本地 CT2 模型目录")
+
+    runs = []
+    for duration in [float(d) for d in args.durations.split(",")]:
+        for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+            run = min((run_isolated(args, duration, batch_size) for _ in range(args.repeat)),
+                      key=lambda r: r["rtf_total"])
+            print_run(run)
+            runs.append(run)
+
+    if args.json:
+        report = {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "model_dir": args.model_dir,
+            "repeat": args.repeat,
+            "runs": runs,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.json}")
+
+    if args.compare:
+        regressions = compare(runs, args.compare, args.threshold)
+        for line in regressions:
+            print(f"回归: {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"与基线 {args.compare} 相比没有超过 {args.threshold:.0%} 的回归")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+create_custom_sentences 基准测试: 合成约 10 万词的中/英文识别结果，测量重新断句耗时。
+
+    python benchmarks/bench_sentence_align.py --words 100000 --max-len 20
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jieba  # noqa: E402
+
+from MW_utils.sentence_align import create_custom_sentences  # noqa: E402
+
+ZH_CHARS = "我们今天天气很好你是谁他在这里学习中文非常有意思的事情大家一起去公园玩"
+EN_WORDS = "the quick brown fox jumps over lazy dog hello world it's well-known data".split()
+
+
+def synthetic_transcript(lang, n_words, seed=0):
+    rng = random.Random(seed)
+    words_list, sentences_list = [], []
+    t = 0.0
+    while len(words_list) < n_words:
+        sentence_words = []
+        for _ in range(rng.randint(5, 40)):
+            if lang == "zh":
+                word = "".join(rng.choice(ZH_CHARS) for _ in range(rng.randint(1, 3)))
+                if rng.random() < 0.15:
+                    word += rng.choice("，。！？、")
+            else:
+                word = rng.choice(EN_WORDS)
+                if rng.random() < 0.15:
+                    word += rng.choice(",.!?")
+            sentence_words.append([t, t + 0.3, word])
+            t += 0.3
+        sep = "" if lang == "zh" else " "
+        sentences_list.append([sentence_words[0][0], sentence_words[-1][1], sep.join(w[2] for w in sentence_words)])
+        words_list.extend(sentence_words)
+    return words_list, sentences_list
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=100000)
+    parser.add_argument("--max-len", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    jieba.setLogLevel(logging.WARNING)
+    jieba.initialize()
+    for lang in ("zh", "en"):
+        words_list, sentences_list = synthetic_transcript(lang, args.words)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = create_custom_sentences(words_list, sentences_list, args.max_len, lang=lang)
+            timings.append(time.perf_counter() - start)
+        print(f"{lang}: {len(words_list)} words, {len(sentences_list)} sentences -> {len(result)} chunks, "
+              f"best {min(timings) * 1000:.1f} ms over {args.repeat} run(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+在 ComfyUI 之外导入节点模块用的最小桩 (folder_paths、comfy.utils、comfy.model_management)，
+供基准测试直接调用真实的节点类和方法。已存在的同名模块 (在 ComfyUI 环境中运行时) 不会被替换。
+"""
+import importlib
+import os
+import sys
+import types
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "ComfyUI_ASR"
+
+
+class ProgressBar:
+    def __init__(self, total):
+        self.total = total
+        self.current = 0
+
+    def update_absolute(self, value, total=None, preview=None):
+        if total is not None:
+            self.total = total
+        self.current = value
+
+
+def install(root):
+    """注册桩模块，模型、输出、临时和用户目录都放在 root 下。"""
+    folder_paths = types.ModuleType("folder_paths")
+    folder_paths.models_dir = os.path.join(root, "models")
+    folder_paths.get_temp_directory = lambda: os.path.join(root, "temp")
+    folder_paths.get_output_directory = lambda: os.path.join(root, "output")
+    folder_paths.get_user_directory = lambda: os.path.join(root, "user")
+    folder_paths.get_input_directory = lambda: os.path.join(root, "input")
+
+    comfy = types.ModuleType("comfy")
+    comfy.utils = types.ModuleType("comfy.utils")
+    comfy.utils.ProgressBar = ProgressBar
+    comfy.model_management = types.ModuleType("comfy.model_management")
+    comfy.model_management.throw_exception_if_processing_interrupted = lambda: None
+
+    for name, module in [("folder_paths", folder_paths), ("comfy", comfy),
+                         ("comfy.utils", comfy.utils), ("comfy.model_management", comfy.model_management)]:
+        sys.modules.setdefault(name, module)
+
+
+def import_node_module(name):
+    """导入 ComfyUI_ASR.<name>，不执行包的 __init__ (启动预加载、节点注册等)。"""
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [REPO_DIR]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.{name}")
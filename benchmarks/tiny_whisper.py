@@ -0,0 +1,134 @@
+"""
+生成一个极小的随机权重 CTranslate2 Whisper 模型 (仅英文词表，约 2 MB)，供基准测试离线使用。
+
+模型结构与 Whisper 相同 (80 维梅尔特征、30 秒窗口、词级时间戳对齐头)，只是层数和维度很小、
+权重随机，识别结果没有意义，但 faster-whisper 的特征提取、编码、解码和对齐流程都会完整执行。
+不依赖 transformers 和网络，只需要 ctranslate2 和 tokenizers (faster-whisper 的依赖)。
+
+    python benchmarks/tiny_whisper.py <输出目录>
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+N_MELS = 80
+N_AUDIO_CTX = 1500
+N_TEXT_CTX = 448
+N_TIMESTAMPS = 1501
+SPECIAL_TOKENS = [
+    "<|endoftext|>", "<|startoftranscript|>", "<|translate|>", "<|transcribe|>",
+    "<|startoflm|>", "<|startofprev|>", "<|nocaptions|>", "<|notimestamps|>",
+]
+
+
+def byte_tokens():
+    """GPT-2 / Whisper 字节级 BPE 的 256 个基础字节符号。"""
+    bs = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + list(range(ord("®"), ord("ÿ") + 1))
+    cs = bs[:]
+    n = 0
+    for b in range(256):
+        if b not in bs:
+            bs.append(b)
+            cs.append(256 + n)
+            n += 1
+    return [chr(c) for _, c in sorted(zip(bs, cs))]
+
+
+def vocabulary():
+    return byte_tokens() + SPECIAL_TOKENS + ["<|%.2f|>" % (i * 0.02) for i in range(N_TIMESTAMPS)]
+
+
+def write_tokenizer(path, tokens):
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+
+    n_bytes = len(byte_tokens())
+    tokenizer = Tokenizer(models.BPE(vocab={t: i for i, t in enumerate(tokens[:n_bytes])}, merges=[]))
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    tokenizer.add_special_tokens(tokens[n_bytes:])
+    tokenizer.save(path)
+
+
+def build_spec(tokens, d_model, n_heads, n_layers, seed):
+    from ctranslate2.specs import whisper_spec
+
+    rng = np.random.default_rng(seed)
+    vocab_size = len(tokens)
+    ffn = d_model * 4
+
+    def rand(*shape):
+        return (rng.standard_normal(shape) * 0.02).astype(np.float32)
+
+    def linear(spec, n_out, n_in):
+        spec.weight = rand(n_out, n_in)
+        spec.bias = np.zeros(n_out, dtype=np.float32)
+
+    def layer_norm(spec):
+        spec.gamma = np.ones(d_model, dtype=np.float32)
+        spec.beta = np.zeros(d_model, dtype=np.float32)
+
+    def ffn_layer(spec):
+        linear(spec.linear_0, ffn, d_model)
+        linear(spec.linear_1, d_model, ffn)
+        layer_norm(spec.layer_norm)
+
+    spec = whisper_spec.WhisperSpec(n_layers, n_heads, n_layers, n_heads)
+
+    encoder = spec.encoder
+    encoder.conv1.weight = rand(d_model, N_MELS, 3)
+    encoder.conv1.bias = np.zeros(d_model, dtype=np.float32)
+    encoder.conv2.weight = rand(d_model, d_model, 3)
+    encoder.conv2.bias = np.zeros(d_model, dtype=np.float32)
+    encoder.position_encodings.encodings = rand(N_AUDIO_CTX, d_model)
+    layer_norm(encoder.layer_norm)
+    for layer in encoder.layer:
+        linear(layer.self_attention.linear[0], 3 * d_model, d_model)
+        linear(layer.self_attention.linear[1], d_model, d_model)
+        layer_norm(layer.self_attention.layer_norm)
+        ffn_layer(layer.ffn)
+
+    decoder = spec.decoder
+    decoder.embeddings.weight = rand(vocab_size, d_model)
+    decoder.position_encodings.encodings = rand(N_TEXT_CTX, d_model)
+    layer_norm(decoder.layer_norm)
+    for layer in decoder.layer:
+        linear(layer.self_attention.linear[0], 3 * d_model, d_model)
+        linear(layer.self_attention.linear[1], d_model, d_model)
+        layer_norm(layer.self_attention.layer_norm)
+        linear(layer.attention.linear[0], d_model, d_model)
+        linear(layer.attention.linear[1], 2 * d_model, d_model)
+        linear(layer.attention.linear[2], d_model, d_model)
+        layer_norm(layer.attention.layer_norm)
+        ffn_layer(layer.ffn)
+    decoder.projection.weight = decoder.embeddings.weight
+
+    spec.register_vocabulary(tokens)
+    spec.config.suppress_ids = []
+    spec.config.suppress_ids_begin = [tokens.index("<|endoftext|>")]
+    spec.config.lang_ids = []
+    spec.config.alignment_heads = [(layer, head) for layer in range(n_layers // 2, n_layers) for head in range(n_heads)]
+    return spec
+
+
+def build_tiny_model(output_dir, d_model=64, n_heads=2, n_layers=2, seed=0):
+    """在 output_dir 生成模型文件 (model.bin / config.json / vocabulary.json / tokenizer.json / preprocessor_config.json) 并返回该目录。"""
+    if os.path.isfile(os.path.join(output_dir, "model.bin")):
+        return output_dir
+    tokens = vocabulary()
+    spec = build_spec(tokens, d_model, n_heads, n_layers, seed)
+    spec.validate()
+    spec.optimize(quantization="float32")
+    os.makedirs(output_dir, exist_ok=True)
+    spec.save(output_dir)
+    write_tokenizer(os.path.join(output_dir, "tokenizer.json"), tokens)
+    with open(os.path.join(output_dir, "preprocessor_config.json"), "w", encoding="utf-8") as f:
+        json.dump({"feature_size": N_MELS, "sampling_rate": 16000, "hop_length": 160, "chunk_length": 30, "n_fft": 400}, f)
+    return output_dir
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit(__doc__)
+    print(build_tiny_model(sys.argv[1]))
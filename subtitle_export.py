@@ -0,0 +1,166 @@
+import os
+import folder_paths
+from .MW_utils.timestamps import TIMESTAMPS_TYPE
+from .MW_utils.subtitle_formats import SUBTITLE_FORMATS, AssStyle, to_ass, to_srt, to_vtt
+from .MW_utils.ffmpeg_utils import run_ffmpeg, subtitles_filter, temp_path, write_wav
+from .MW_utils.profiling import StageProfiler
+from .subtitles2video import (
+    load_subtitles, resolve_language, clean_punctuation_from_subtitles, hex_to_rgb, get_font_list,
+    video_frames, frames_to_uint8,
+)
+
+cache_dir = folder_paths.get_temp_directory()
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+X264_PRESETS = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow"]
+
+
+def output_path(prefix, ext):
+    full_output_folder, filename, counter, _, _ = folder_paths.get_save_image_path(prefix, folder_paths.get_output_directory())
+    os.makedirs(full_output_folder, exist_ok=True)
+    return os.path.join(full_output_folder, f"{filename}_{counter:05}_.{ext}")
+
+
+def font_family_name(font_path):
+    """ASS 样式按字体族名引用字体，从字体文件中读取。"""
+    from PIL import ImageFont
+    try:
+        return ImageFont.truetype(font_path, 10).getname()[0]
+    except OSError:
+        return os.path.splitext(os.path.basename(font_path))[0]
+
+
+class SubtitleExportMW:
+    @classmethod
+    def INPUT_TYPES(cls):
+        font_list = get_font_list()
+        return {
+            "required": {
+                "格式": (SUBTITLE_FORMATS, {"default": "srt", "tooltip": "导出的字幕格式; ass 会带上下面的字体、颜色、描边和边距样式"}),
+                "文件名前缀": ("STRING", {"default": "asr_mw/subtitles", "tooltip": "保存到 ComfyUI output 目录下的文件名前缀"}),
+            },
+            "optional": {
+                "字幕文本": ("STRING", {"forceInput": True, "tooltip": "逐句或逐词时间戳"}),
+                "时间戳数据": (TIMESTAMPS_TYPE, {"tooltip": "逐句或逐词时间戳数据, 连接后优先于字幕文本使用"}),
+                "字体": (font_list, {"tooltip": "ASS 字幕字体, 放在节点目录 fonts 下"}),
+                "字体大小比例": ("FLOAT", {"default": 0.05, "min": 0.01, "max": 0.2, "step": 0.01, "tooltip": "ASS 字幕字体大小与视频宽度的比例"}),
+                "视频宽度": ("INT", {"default": 1920, "min": 16, "max": 8192, "step": 1, "tooltip": "ASS 的 PlayResX, 应与视频宽度一致"}),
+                "视频高度": ("INT", {"default": 1080, "min": 16, "max": 8192, "step": 1, "tooltip": "ASS 的 PlayResY, 应与视频高度一致"}),
+                "字体颜色": ("STRING", {"default": "#FFFFFF", "tooltip": "字体颜色, 格式为 #RRGGBB"}),
+                "字体背景色": ("STRING", {"default": "#000000", "tooltip": "字体背景颜色, 格式为 #RRGGBB"}),
+                "背景透明度": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 1.0, "step": 0.1, "tooltip": "字幕背景透明度, 0为无背景框; 有背景框时 ASS 不绘制描边"}),
+                "描边宽度": ("INT", {"default": 2, "min": 0, "max": 50, "step": 1, "tooltip": "字幕字体描边宽度, 0为不描边"}),
+                "描边颜色": ("STRING", {"default": "#000000", "tooltip": "留空则使用与字体相同的颜色, 格式为 #RRGGBB"}),
+                "字幕宽度比例": ("FLOAT", {"default": 0.9, "min": 0.1, "max": 1.0, "step": 0.05, "tooltip": "字幕宽度与视频宽度的比例, 换算为 ASS 左右边距"}),
+                "垂直向上偏移": ("INT", {"default": 30, "min": 0, "max": 2000, "step": 5, "tooltip": "字幕距视频底部的像素数 (ASS MarginV)"}),
+                "行内边距": ("INT", {"default": 5, "min": 0, "max": 100, "step": 1, "tooltip": "有背景框时, 框与文字的间距"}),
+                "去除标点符号": ("BOOLEAN", {"default": False, "tooltip": "是否去除所有标点符号并替换为空格"}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("字幕内容", "字幕文件")
+    FUNCTION = "export"
+    CATEGORY = "🎤MW/MW-ASR"
+    OUTPUT_NODE = True
+
+    def export(self, 格式, 文件名前缀, 字幕文本=None, 时间戳数据=None, 字体=None, 字体大小比例=0.05, 视频宽度=1920, 视频高度=1080,
+               字体颜色="#FFFFFF", 字体背景色="#000000", 背景透明度=0.0, 描边宽度=2, 描边颜色="#000000",
+               字幕宽度比例=0.9, 垂直向上偏移=30, 行内边距=5, 去除标点符号=False):
+        subtitles_data = load_subtitles(字幕文本, 时间戳数据)
+        if 去除标点符号:
+            lang = resolve_language(subtitles_data, 时间戳数据)
+            subtitles_data = clean_punctuation_from_subtitles(subtitles_data, lang=lang)
+
+        if 格式 == "srt":
+            content = to_srt(subtitles_data)
+        elif 格式 == "vtt":
+            content = to_vtt(subtitles_data)
+        else:
+            font_color_rgb = hex_to_rgb(字体颜色)
+            side_margin = int(视频宽度 * (1 - 字幕宽度比例) / 2)
+            style = AssStyle(
+                font_name=font_family_name(os.path.join(FONT_DIR, 字体)) if 字体 else "Arial",
+                font_size=int(视频宽度 * 字体大小比例), font_color=font_color_rgb,
+                bg_color=hex_to_rgb(字体背景色), bg_opacity=背景透明度,
+                stroke_color=hex_to_rgb(描边颜色) if 描边颜色.strip() else font_color_rgb, stroke_width=描边宽度,
+                margin_l=side_margin, margin_r=side_margin, margin_v=垂直向上偏移, box_padding=行内边距,
+                play_res=(视频宽度, 视频高度),
+            )
+            content = to_ass(subtitles_data, style)
+
+        path = output_path(文件名前缀, 格式)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return (content, path)
+
+
+class BurnSubtitlesMW:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "字幕文件": ("STRING", {"forceInput": True, "tooltip": "srt / vtt / ass 字幕文件路径, 可连接导出字幕文件节点"}),
+                "编码预设": (X264_PRESETS, {"default": "fast", "tooltip": "libx264 编码预设, 越快文件越大"}),
+                "CRF": ("INT", {"default": 18, "min": 0, "max": 51, "step": 1, "tooltip": "libx264 质量, 越小质量越高"}),
+                "文件名前缀": ("STRING", {"default": "asr_mw/burned", "tooltip": "保存到 ComfyUI output 目录下的文件名前缀"}),
+            },
+            "optional": {
+                "视频": ("IMAGE", {"tooltip": "输入视频帧, 与视频文件二选一"}),
+                "帧率": ("FLOAT", {"forceInput": True, "tooltip": "输入视频帧的帧率"}),
+                "音频": ("AUDIO", {"tooltip": "可选, 与视频帧一起封装"}),
+                "视频文件": ("STRING", {"forceInput": True, "tooltip": "输入视频文件路径, 优先于视频帧使用, 音轨原样复制"}),
+                "处理窗口帧数": ("INT", {"default": 64, "min": 1, "max": 10000, "step": 1, "tooltip": "视频帧每次转换并送入 ffmpeg 的帧数"}),
+                "性能统计": ("BOOLEAN", {"default": False, "tooltip": "记录各阶段耗时、CPU 时间和峰值内存, 打印汇总并从 性能统计 输出 JSON; 也可用环境变量 MW_ASR_PROFILE=1 对所有节点开启"}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("视频文件", "性能统计")
+    FUNCTION = "burn"
+    CATEGORY = "🎤MW/MW-ASR"
+    OUTPUT_NODE = True
+
+    def burn(self, 字幕文件, 编码预设, CRF, 文件名前缀, 视频=None, 帧率=None, 音频=None, 视频文件=None, 处理窗口帧数=64,
+             性能统计=False):
+        profiler = StageProfiler("BurnSubtitlesMW", 性能统计)
+        if not 字幕文件 or not os.path.isfile(字幕文件):
+            raise ValueError(f"错误：字幕文件不存在: {字幕文件}")
+        path = output_path(文件名前缀, "mp4")
+        encode_args = ["-vf", subtitles_filter(字幕文件, FONT_DIR),
+                       "-c:v", "libx264", "-preset", 编码预设, "-crf", str(CRF), "-pix_fmt", "yuv420p"]
+
+        # ffmpeg 一次流式完成解码、字幕渲染 (libass) 和编码
+        if 视频文件:
+            if not os.path.isfile(视频文件):
+                raise ValueError(f"错误：视频文件不存在: {视频文件}")
+            with profiler.stage("ffmpeg"):
+                run_ffmpeg(["-i", 视频文件, "-map", "0:v:0", "-map", "0:a?"] + encode_args + ["-c:a", "copy", path])
+            return (path, profiler.finish(source="file"))
+
+        if 视频 is None or not 帧率:
+            raise ValueError("错误：请连接视频文件，或同时连接视频帧和帧率。")
+        video = video_frames(视频)
+        n_frames, height, width = video.shape[:3]
+        window = max(int(处理窗口帧数), 1)
+        args = ["-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(帧率), "-i", "-"]
+
+        audio_path = None
+        if 音频 is not None:
+            audio_path = temp_path(".wav", cache_dir)
+            with profiler.stage("audio_write"):
+                write_wav(audio_path, 音频["waveform"][0].cpu().numpy(), 音频["sample_rate"])
+            args += ["-i", audio_path, "-map", "0:v", "-map", "1:a", "-c:a", "aac", "-shortest"]
+        def windows():
+            for start in range(0, n_frames, window):
+                with profiler.timed("frame_convert"):
+                    frames = frames_to_uint8(video[start:start + window])
+                yield frames
+
+        try:
+            # ffmpeg 阶段包含帧转换和写入管道时等待编码的时间
+            with profiler.stage("ffmpeg"):
+                run_ffmpeg(args + encode_args + [path], windows())
+        finally:
+            if audio_path:
+                os.remove(audio_path)
+        return (path, profiler.finish(source="frames", frames=n_frames))
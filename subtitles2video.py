@@ -1,13 +1,18 @@
 import os
 import torch
 import numpy as np
-import tempfile
-from moviepy import VideoFileClip, TextClip, CompositeVideoClip, ColorClip, ImageSequenceClip
 import folder_paths
-import langid
 import re
+from .MW_utils.timestamps import TIMESTAMPS_TYPE
+from .MW_utils.text_models import detect_language, normalize_language
+from .MW_utils.text_layout import get_measurer
+from .MW_utils.subtitle_render import create_sprite_cache, font_file_hash, render_text_rgba, stack_lines
+from .MW_utils.compositor import OverlayTimeline, SubtitleOverlay, composite_overlays
+from .MW_utils.parallel import parallel_map, resolve_workers
+from .MW_utils.profiling import NO_PROFILER, StageProfiler
 
 cache_dir = folder_paths.get_temp_directory()
+SPRITE_CACHE = create_sprite_cache()
 PUNCTUATION = "＂＃＄％＆＇（）＊＋，－／：；＜＝＞＠［＼］＾＿｀｛｜｝～｟｠｢｣､、〃『』【】〖〗〘〙〚〛〜〝〞〟–—‘’‛„‟…‧﹏." \
               "!?(),;:[]{}<>\"+-=&^*%$#@/" \
               "。？！，、；：“”‘'《》〈〉「」〔〕——·~`-"
@@ -27,6 +32,93 @@ def reverse_convert_to_list(text):
     
     return result
 
+def load_subtitles(subtitle_text, timestamps=None):
+    """优先使用 MW_TIMESTAMPS 结构化时间戳，未连接时再解析时间戳文本；空文本 (没有识别到语音) 返回空列表。"""
+    if timestamps is not None:
+        return timestamps.to_list()
+    if subtitle_text is None:
+        raise ValueError("错误：请连接字幕文本或时间戳数据。")
+    try:
+        return reverse_convert_to_list(subtitle_text)
+    except ValueError:
+        raise ValueError("错误：字幕文本不是有效的格式。")
+
+def resolve_language(subtitles, timestamps=None):
+    """优先使用时间戳数据中识别时检测到的语言，否则只对字幕文本的有限样本做语言识别。"""
+    if timestamps is not None and timestamps.language:
+        return normalize_language(timestamps.language)
+    if not subtitles:
+        return 'en'
+    lang, _ = detect_language(" ".join(t for _, _, t in subtitles))
+    return lang
+
+def video_frames(video):
+    """校验 IMAGE 张量 [帧, 高, 宽, 3] (允许前置批次维 1)，返回去掉批次维的视图，不复制数据。"""
+    if not isinstance(video, torch.Tensor):
+        raise ValueError("输入视频格式不正确")
+    if video.dim() == 5:
+        if video.shape[0] != 1:
+            raise ValueError("输入视频批次大小应为1")
+        video = video.squeeze(0)
+    return video
+
+def frames_to_uint8(frames):
+    """
+    把一段 IMAGE 帧转为可原地修改的 uint8 numpy 数组 (总是新的副本)；任意浮点类型 (含 float16/bfloat16) 按 0-1 缩放。
+    浮点帧逐帧缩放并直接写入 uint8 结果，不生成整段的浮点临时数组。
+    """
+    if not frames.is_floating_point():
+        return np.array(frames.cpu().numpy(), dtype=np.uint8, copy=True)
+    result = np.empty(tuple(frames.shape), dtype=np.uint8)
+    for i, frame in enumerate(frames):
+        if frame.dtype not in (torch.float32, torch.float64):
+            frame = frame.float()
+        np.multiply(frame.cpu().numpy(), 255, out=result[i], casting="unsafe")
+    return result
+
+OUTPUT_DTYPES = {"float32": torch.float32, "float16": torch.float16, "uint8": torch.uint8}
+
+def write_frames(output, frames):
+    """把 uint8 帧写入预分配的输出张量切片，浮点输出在写入时原地归一化到 0-1。"""
+    output.copy_(torch.from_numpy(frames))
+    if output.is_floating_point():
+        output.div_(255.0)
+
+def composite_frames(video, fps, overlays, output_dtype="float32", window=64, workers=1, profiler=NO_PROFILER):
+    """
+    直接在内存中把字幕位图叠加到每一帧上并返回 IMAGE 张量，
+    不再经过 mp4 编码/解码，输出帧数与输入一致且没有有损压缩。
+    结果直接写入一个预分配的 output_dtype 张量，不再逐帧生成再 stack。
+    输入按 window 帧一段流式处理 (转换、合成、写入输出切片、释放)，额外内存只与窗口大小有关：
+    多线程时每个线程处理 window / workers 帧的子窗口，同时处理中的帧数之和不超过 window。
+    各子窗口写入输出张量中互不重叠的切片，结果与单线程相同。
+    profiler 按线程累计帧转换、合成和写入输出的耗时。
+    字幕块按显示帧区间只索引一次，每个窗口只混合与其重叠的字幕块。
+    """
+    n_frames = len(video)
+    window = max(int(window), 1)
+    output = torch.empty((*video.shape[:3], 3), dtype=OUTPUT_DTYPES[output_dtype])
+    timeline = OverlayTimeline(overlays, fps, n_frames)
+    workers = min(resolve_workers(workers), window)
+    step = -(-window // workers)
+
+    def process(start):
+        end = min(start + step, n_frames)
+        with profiler.timed("frame_convert"):
+            frames = frames_to_uint8(video[start:end])
+        with profiler.timed("composite"):
+            composite_overlays(frames, timeline, fps, first_frame=start)
+        with profiler.timed("output_write"):
+            write_frames(output[start:end], frames)
+
+    parallel_map(process, range(0, n_frames, step), workers)
+    return output
+
+def horizontal_position(align, video_width, block_width):
+    if align == 'left': return 0
+    if align == 'right': return video_width - block_width
+    return int((video_width - block_width) / 2)
+
 def hex_to_rgb(hex_color: str):
     hex_color = hex_color.lstrip('#')
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
@@ -86,15 +178,15 @@ def clean_punctuation_from_subtitles(subtitles, lang='en'):
 
 def smart_wrap_static(text, max_width_for_wrapping, font, font_size, language='en', stroke_width=0):
     if not text.strip(): return ""
+    measurer = get_measurer(font, font_size, stroke_width)
 
     if language == 'zh': 
-        lines, current_line = [], ''
-        for char in text:
-            test_line = f"{current_line}{char}"
-            line_width = TextClip(text=test_line, font=font, font_size=font_size, stroke_width=stroke_width, method='label').w
-            if line_width <= max_width_for_wrapping: current_line = test_line
-            else: lines.append(current_line); current_line = char
-        lines.append(current_line)
+        lines, start = [], 0
+        if measurer.width(text[0]) > max_width_for_wrapping: lines.append('')
+        prefix = measurer.prefix_advances(text)
+        while start < len(text):
+            end = measurer.fit(text, start, max_width_for_wrapping, prefix)
+            lines.append(text[start:end]); start = end
         corrected_lines = list(lines)
         for i in range(1, len(corrected_lines)):
             while corrected_lines[i] and corrected_lines[i][0] in PUNCTUATION:
@@ -109,7 +201,7 @@ def smart_wrap_static(text, max_width_for_wrapping, font, font_size, language='e
             if not word: continue
             temp_line_words = current_line_words + [word]
             test_line = " ".join(temp_line_words)
-            line_width = TextClip(text=test_line, font=font, font_size=font_size, stroke_width=stroke_width, method='label').w
+            line_width = measurer.width(test_line)
             if line_width <= max_width_for_wrapping: current_line_words.append(word)
             else:
                 if word and word[0] in PUNCTUATION and len(current_line_words) > 0:
@@ -122,7 +214,7 @@ def smart_wrap_static(text, max_width_for_wrapping, font, font_size, language='e
         if current_line_words: lines.append(" ".join(current_line_words))
         return '\n'.join([line for line in lines if line.strip()])
 
-def create_static_subtitle_clip(text, start_time, end_time, video_width, video_height, **kwargs):
+def create_static_subtitle_overlay(text, start_time, end_time, video_width, video_height, profiler=NO_PROFILER, **kwargs):
     font_size = kwargs.get('font_size', 24)
     font_path = kwargs.get('font_path', 'msyh.ttc')
     font_color = kwargs.get('font_color', (255, 255, 255))
@@ -139,24 +231,31 @@ def create_static_subtitle_clip(text, start_time, end_time, video_width, video_h
     language = kwargs.get('language', 'en')
 
     allowed_width = int(video_width * line_width_ratio)
-    wrapped_text = smart_wrap_static(text, allowed_width, font_path, font_size, language, stroke_width)
 
-    if not wrapped_text.strip():
-        return ColorClip(size=(1, 1), color=(0,0,0), duration=end_time-start_time).with_opacity(0).with_start(start_time)
+    if not text.strip():
+        return None
 
     bg_color_with_alpha = bg_color + (int(bg_opacity * 255),)
     default_inner_margin = int(font_size * 0.2)
     inner_margin_tuple = parse_margin(margin_str, default_inner_margin)
 
-    subtitle_block = TextClip(
-        text=wrapped_text, font=font_path, font_size=font_size, color=f'rgb{font_color}',
-        bg_color=bg_color_with_alpha, stroke_color=f'rgb{stroke_color}', stroke_width=stroke_width,
-        method='label', text_align=text_align, margin=inner_margin_tuple, interline=interline
-    )
-    subtitle_block = subtitle_block.with_start(start_time).with_duration(end_time - start_time)
-    
-    y_pos = video_height - subtitle_block.h - vertical_pos_offset
-    return subtitle_block.with_position((block_horizontal_align, y_pos))
+    def render():
+        with profiler.timed("wrap"):
+            wrapped_text = smart_wrap_static(text, allowed_width, font_path, font_size, language, stroke_width)
+        with profiler.timed("rasterize"):
+            return render_text_rgba(
+                wrapped_text, font_path, font_size, font_color, bg_color_with_alpha, stroke_color, stroke_width,
+                inner_margin_tuple, text_align, interline
+            )
+
+    # 换行和栅格化结果只取决于文本和样式，相同字幕块 (重复的句子、只换了视频的重跑) 直接复用
+    sprite_key = ("static", text, font_file_hash(font_path), font_size, tuple(font_color), bg_color_with_alpha,
+                  tuple(stroke_color), stroke_width, inner_margin_tuple, text_align, interline, allowed_width, language)
+    subtitle_block = SPRITE_CACHE.get(sprite_key, render)
+    block_h, block_w = subtitle_block.shape[:2]
+    x_pos = horizontal_position(block_horizontal_align, video_width, block_w)
+    y_pos = video_height - block_h - vertical_pos_offset
+    return SubtitleOverlay(subtitle_block, x_pos, y_pos, start_time, end_time)
 
 class StaticSubtitlesToVideoMW:
     @classmethod
@@ -165,7 +264,6 @@ class StaticSubtitlesToVideoMW:
         return {
             "required": {
                 "视频": ("IMAGE",), "帧率": ("FLOAT", {"forceInput": True}),
-                "字幕文本": ("STRING", {"forceInput": True, "tooltip": "逐句时间戳"}),
                 "字体": (font_list, {"tooltip": "字幕字体，放在节点目录 fonts 下"}), 
                 "字体大小比例": ("FLOAT", {"default": 0.05, "min": 0.01, "max": 0.2, "step": 0.01}, {"tooltip": "字幕字体大小与视频宽度的比例"}),
                 "字体颜色": ("STRING", {"default": "#FFFFFF", "tooltip": "字体颜色，格式为#RRGGBB"}), 
@@ -173,6 +271,8 @@ class StaticSubtitlesToVideoMW:
                 "背景透明度": ("FLOAT", {"default": 0.5, "min": 0.0, "max": 1.0, "step": 0.1}, {"tooltip": "字幕背景透明度，0为完全透明，1为完全不透明"}),
             },
             "optional": {
+                "字幕文本": ("STRING", {"forceInput": True, "tooltip": "逐句时间戳"}),
+                "时间戳数据": (TIMESTAMPS_TYPE, {"tooltip": "逐句时间戳数据, 连接后优先于字幕文本使用"}),
                 "字幕宽度比例": ("FLOAT", {"default": 0.9, "min": 0.1, "max": 1.0, "step": 0.05}, {"tooltip": "字幕宽度与视频宽度的比例"}),
                 "垂直向上偏移": ("INT", {"default": 30, "min": 0, "max": 2000, "step": 5}, {"tooltip": "字幕块垂直向上偏移量"}),
                 # "字幕块水平位置": (["left", "center", "right"], {"default": "center"}, {"tooltip": "字幕块水平位置"}),
@@ -183,44 +283,32 @@ class StaticSubtitlesToVideoMW:
                 "行内字体上边距": ("INT", {"default": 5, "min": 0, "max": 100, "step": 1}, {"tooltip": "字幕字体与背景框顶部的间距"}),
                 "行内字体下边距": ("INT", {"default": 10, "min": 0, "max": 100, "step": 1}, {"tooltip": "字幕字体与背景框底部的间距"}),
                 "去除标点符号": ("BOOLEAN", {"default": False, "tooltip": "是否去除所有标点符号并替换为空格"}),
+                "输出数据类型": (list(OUTPUT_DTYPES), {"default": "float32", "tooltip": "输出 IMAGE 的数据类型; float16 / uint8 可显著减少内存, 仅在下游节点支持时使用"}),
+                "处理窗口帧数": ("INT", {"default": 64, "min": 1, "max": 10000, "step": 1, "tooltip": "每次转换和合成的帧数, 越小内存峰值越低, 长视频可调小"}),
+                "渲染线程数": ("INT", {"default": 0, "min": 0, "max": 256, "step": 1, "tooltip": "字幕栅格化和合成的线程数, 0 为使用全部 CPU 核心, 1 为单线程; 结果与单线程完全一致"}),
+                "性能统计": ("BOOLEAN", {"default": False, "tooltip": "记录各阶段耗时、CPU 时间和峰值内存, 打印汇总并从 性能统计 输出 JSON; 也可用环境变量 MW_ASR_PROFILE=1 对所有节点开启"}),
             }
         }
-    RETURN_TYPES = ("IMAGE",); RETURN_NAMES = ("静态字幕视频",)
+    RETURN_TYPES = ("IMAGE", "STRING"); RETURN_NAMES = ("静态字幕视频", "性能统计")
     FUNCTION = "add_subtitles"; CATEGORY = "🎤MW/MW-ASR"
 
-    def add_subtitles(self, 视频, 帧率, 字幕文本, 字体, 字体大小比例, 字体颜色, 字体背景色, 背景透明度,
-                     字幕宽度比例=0.9, 垂直向上偏移=30, 字幕块水平位置="center", 文本行对齐方式="center",
-                     行间距=4, 描边宽度=1, 描边颜色="", 行内字体上边距=5, 行内字体下边距=10, 去除标点符号=False):
-
-        if isinstance(视频, torch.Tensor):
-            video_np = 视频.cpu().numpy()
-            if video_np.ndim == 5 and video_np.shape[0] == 1: video_np = video_np.squeeze(0)
-            if video_np.dtype == np.float32 or video_np.dtype == np.float64:
-                 video_np = (video_np * 255).astype(np.uint8)
-        else: raise ValueError("输入视频格式不正确")
-        
-        temp_input_path = tempfile.NamedTemporaryFile(suffix='.mp4', dir=cache_dir, delete=False).name
-        temp_output_path = tempfile.NamedTemporaryFile(suffix='.mp4', dir=cache_dir, delete=False).name
-        clip = ImageSequenceClip(list(video_np), fps=帧率)
-        clip.write_videofile(temp_input_path, codec='libx264', audio_codec='aac')
+    def add_subtitles(self, 视频, 帧率, 字体, 字体大小比例, 字体颜色, 字体背景色, 背景透明度,
+                     字幕文本=None, 时间戳数据=None, 字幕宽度比例=0.9, 垂直向上偏移=30, 字幕块水平位置="center", 文本行对齐方式="center",
+                     行间距=4, 描边宽度=1, 描边颜色="", 行内字体上边距=5, 行内字体下边距=10, 去除标点符号=False, 输出数据类型="float32", 处理窗口帧数=64, 渲染线程数=0, 性能统计=False):
+        profiler = StageProfiler("StaticSubtitlesToVideoMW", 性能统计)
+        video = video_frames(视频)
 
         font_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts", 字体)
         font_color_rgb, bg_color_rgb = hex_to_rgb(字体颜色), hex_to_rgb(字体背景色)
         stroke_color_rgb = hex_to_rgb(描边颜色) if 描边颜色.strip() else font_color_rgb
 
-        try: 
-            subtitles_data = reverse_convert_to_list(字幕文本)
-        except ValueError: raise ValueError("错误：字幕文本不是有效的格式。")
-        
-        if subtitles_data:
-            lang, _ = langid.classify(字幕文本)
-        else: lang = 'en'
-        
-        if 去除标点符号:
-            subtitles_data = clean_punctuation_from_subtitles(subtitles_data, lang=lang)
+        with profiler.stage("parse"):
+            subtitles_data = load_subtitles(字幕文本, 时间戳数据)
+            lang = resolve_language(subtitles_data, 时间戳数据)
+            if 去除标点符号:
+                subtitles_data = clean_punctuation_from_subtitles(subtitles_data, lang=lang)
 
-        video_clip_in = VideoFileClip(temp_input_path)
-        video_width, video_height = video_clip_in.size
+        video_height, video_width = video.shape[1:3]
         
         font_size_px = int(video_width * 字体大小比例)
 
@@ -232,23 +320,23 @@ class StaticSubtitlesToVideoMW:
             'block_horizontal_align': 字幕块水平位置, 'language': lang,
         }
         
-        subtitle_clips = [create_static_subtitle_clip(text, start, end, video_width, video_height, **subtitle_settings) 
-                          for start, end, text in subtitles_data]
-        
-        final_clip = CompositeVideoClip([video_clip_in] + subtitle_clips)
-        final_clip.write_videofile(temp_output_path, codec='libx264', audio_codec='aac', threads=4, preset='fast')
-        
-        output_clip = VideoFileClip(temp_output_path)
-        output_frames = [torch.from_numpy(frame).float() / 255.0 for frame in output_clip.iter_frames()]
-        output_clip.close()
-
-        return (torch.stack(output_frames),)
+        with profiler.stage("render"):
+            overlays = parallel_map(
+                lambda item: create_static_subtitle_overlay(item[2], item[0], item[1], video_width, video_height,
+                                                            profiler=profiler, **subtitle_settings),
+                subtitles_data, 渲染线程数
+            )
+            overlays = [o for o in overlays if o is not None]
+
+        with profiler.stage("composite_frames"):
+            output = composite_frames(video, 帧率, overlays, 输出数据类型, 处理窗口帧数, 渲染线程数, profiler)
+        return (output, profiler.finish(frames=len(video), subtitles=len(subtitles_data), overlays=len(overlays)))
 
 # ==============================================================================
 #  NODE 2: DYNAMIC SUBTITLES
 # ==============================================================================
 
-def generate_dynamic_subtitles(subtitles, video_width, video_height, **kwargs):
+def generate_dynamic_subtitles(subtitles, video_width, video_height, workers=1, profiler=NO_PROFILER, **kwargs):
     font_path = kwargs.get('font_path', 'msyh.ttc')
     font_size = kwargs.get('font_size', 24)
     font_color = kwargs.get('font_color', (255, 255, 255))
@@ -270,6 +358,14 @@ def generate_dynamic_subtitles(subtitles, video_width, video_height, **kwargs):
     default_inner_margin = int(font_size * 0.1)
     inner_margin_tuple = parse_margin(margin_str, default_inner_margin)
     is_chinese = language != 'en'
+    measurer = get_measurer(font_path, font_size, stroke_width)
+    line_style = (font_file_hash(font_path), font_size, tuple(font_color), bg_color_with_alpha, tuple(stroke_color),
+                  stroke_width, inner_margin_tuple, text_align)
+
+    def render_line(line):
+        with profiler.timed("rasterize"):
+            return render_text_rgba(line, font_path, font_size, font_color, bg_color_with_alpha, stroke_color,
+                                    stroke_width, inner_margin_tuple, text_align)
 
     if not subtitles: return []
     blocks = []
@@ -286,8 +382,9 @@ def generate_dynamic_subtitles(subtitles, video_width, video_height, **kwargs):
         last_word_end_time = end
     if current_block: blocks.append(current_block)
 
-    all_clips = []
-    for block in blocks:
+    # 清空阈值切出的各字幕块互不依赖，并行栅格化后按时间顺序合并
+    def render_block(block):
+        block_overlays = []
         
         lines = [""] 
         for i, word_data in enumerate(block):
@@ -306,10 +403,9 @@ def generate_dynamic_subtitles(subtitles, video_width, video_height, **kwargs):
                 separator = " " if current_line else ""
                 test_line = current_line + separator + word_to_add
 
-            test_clip = TextClip(text=test_line, font=font_path, font_size=font_size, 
-                                 stroke_width=stroke_width, method='label')
-            
-            if test_clip.w <= allowed_width:
+            with profiler.timed("wrap"):
+                fits = measurer.width(test_line) <= allowed_width
+            if fits:
                 
                 lines[-1] = test_line
             else:
@@ -317,38 +413,29 @@ def generate_dynamic_subtitles(subtitles, video_width, video_height, **kwargs):
                 lines.append(word_to_add)
             visible_lines = lines[-max_lines:]
 
-            line_clips = [TextClip(text=line, font=font_path, font_size=font_size, color=f'rgb{font_color}', 
-                                   bg_color=f'rgba{bg_color_with_alpha}', stroke_color=f'rgb{stroke_color}', 
-                                   stroke_width=stroke_width, method='label', 
-                                   text_align=text_align, margin=inner_margin_tuple) 
-                          for line in visible_lines if line.strip()]
-            
-            if not line_clips: continue
-            total_height = sum(lc.h for lc in line_clips) + max(0, len(line_clips) - 1) * interline
+            # 已完成的行从缓存中取位图，每个时刻只需渲染正在增长的最后一行
+            line_images = [SPRITE_CACHE.get(("line", line) + line_style, lambda line=line: render_line(line))
+                           for line in visible_lines if line.strip()]
             
-            max_line_width = max(lc.w for lc in line_clips) if line_clips else 0
-            canvas_size = (max_line_width, int(total_height))
-            
-            y_pos_on_canvas = 0
-            positioned_clips = []
-            for lc in line_clips:
-                
-                positioned_clip = lc.with_position((0, y_pos_on_canvas))
-                positioned_clips.append(positioned_clip)
-                y_pos_on_canvas += lc.h + interline
-            
-            moment_canvas = CompositeVideoClip(positioned_clips, size=canvas_size).with_opacity(1)
+            if not line_images: continue
+            with profiler.timed("stack_lines"):
+                moment_canvas = stack_lines(line_images, interline)
             
             start_time = word_data['start']
             
             end_time = block[i+1]['start'] if i + 1 < len(block) else block[-1]['end']
             duration = end_time - start_time
             if duration <= 0.01: continue
-            y_final = video_height - moment_canvas.h - vertical_pos_offset
-            final_clip_for_moment = moment_canvas.with_start(start_time).with_duration(duration).with_position(('center', y_final))
-            all_clips.append(final_clip_for_moment)
-            
-    return all_clips
+            canvas_h, canvas_w = moment_canvas.shape[:2]
+            x_final = horizontal_position('center', video_width, canvas_w)
+            y_final = video_height - canvas_h - vertical_pos_offset
+            block_overlays.append(SubtitleOverlay(moment_canvas, x_final, y_final, start_time, end_time))
+        return block_overlays
+
+    all_overlays = []
+    for block_overlays in parallel_map(render_block, blocks, workers):
+        all_overlays.extend(block_overlays)
+    return all_overlays
 
 class DynamicSubtitlesToVideoMW:
     @classmethod
@@ -358,7 +445,6 @@ class DynamicSubtitlesToVideoMW:
             "required": {
                 "视频": ("IMAGE",), 
                 "帧率": ("FLOAT", {"forceInput": True, "tooltip": "视频帧率"}),
-                "字幕文本": ("STRING", {"forceInput": True, "tooltip": "逐词时间戳"}),
                 "字体": (font_list, {"tooltip": "字幕字体, 放在节点文件夹 fonts 下"}), 
                 "字体大小比例": ("FLOAT", {"default": 0.05, "min": 0.01, "max": 0.2, "step": 0.01, "tooltip": "字幕字体大小与视频宽度的比例"}),
                 "字体颜色": ("STRING", {"default": "#FFFFFF", "tooltip": "字幕字体颜色, 格式为 #RRGGBB"}), 
@@ -366,6 +452,8 @@ class DynamicSubtitlesToVideoMW:
                 "背景透明度": ("FLOAT", {"default": 0.5, "min": 0.0, "max": 1.0, "step": 0.1, "tooltip": "字幕字体背景透明度, 0为完全透明, 1为完全不透明"}),
             },
             "optional": {
+                "字幕文本": ("STRING", {"forceInput": True, "tooltip": "逐词时间戳"}),
+                "时间戳数据": (TIMESTAMPS_TYPE, {"tooltip": "逐词时间戳数据, 连接后优先于字幕文本使用"}),
                 "最大行数": ("INT", {"default": 2, "min": 1, "max": 10, "step": 1, "tooltip": "屏幕上同时显示的最大字幕行数"}),
                 "字幕宽度比例": ("FLOAT", {"default": 0.9, "min": 0.1, "max": 1.0, "step": 0.05, "tooltip": "字幕宽度与视频宽度的比例"}),
                 "垂直向上偏移": ("INT", {"default": 50, "min": 0, "max": 2000, "step": 10, "tooltip": "字幕垂直向上偏移的像素数"}),
@@ -376,56 +464,32 @@ class DynamicSubtitlesToVideoMW:
                 "行内字体下边距": ("INT", {"default": 10, "min": 0, "max": 50, "step": 1, "tooltip": "字幕字体与背景框底部的间距"}),
                 "清空阈值": ("FLOAT", {"default": 2.0, "min": 0.1, "max": 10.0, "step": 0.1, "tooltip": "前后两句话之间静音超过该秒数，则清空字幕重新开始"}),
                 "去除标点符号": ("BOOLEAN", {"default": False, "tooltip": "是否去除所有标点符号"}),
+                "输出数据类型": (list(OUTPUT_DTYPES), {"default": "float32", "tooltip": "输出 IMAGE 的数据类型; float16 / uint8 可显著减少内存, 仅在下游节点支持时使用"}),
+                "处理窗口帧数": ("INT", {"default": 64, "min": 1, "max": 10000, "step": 1, "tooltip": "每次转换和合成的帧数, 越小内存峰值越低, 长视频可调小"}),
+                "渲染线程数": ("INT", {"default": 0, "min": 0, "max": 256, "step": 1, "tooltip": "字幕栅格化和合成的线程数, 0 为使用全部 CPU 核心, 1 为单线程; 结果与单线程完全一致"}),
+                "性能统计": ("BOOLEAN", {"default": False, "tooltip": "记录各阶段耗时、CPU 时间和峰值内存, 打印汇总并从 性能统计 输出 JSON; 也可用环境变量 MW_ASR_PROFILE=1 对所有节点开启"}),
             }
         }
-    RETURN_TYPES = ("IMAGE",); RETURN_NAMES = ("动态字幕视频",)
+    RETURN_TYPES = ("IMAGE", "STRING"); RETURN_NAMES = ("动态字幕视频", "性能统计")
     FUNCTION = "add_dynamic_subtitles"; CATEGORY = "🎤MW/MW-ASR"
     
-    def add_dynamic_subtitles(self, 视频, 帧率, 字幕文本, 字体, 字体大小比例, 字体颜色, 字体背景色, 背景透明度, 
-                     最大行数=3, 字幕宽度比例=0.9, 垂直向上偏移=50, 行间距=10, 描边宽度=1, 
-                     描边颜色="", 行内字体上边距=5, 行内字体下边距=5, 清空阈值=2.0, 去除标点符号=False):
-        if isinstance(视频, torch.Tensor):
-            video_np = 视频.cpu().numpy()
-            if video_np.ndim == 4: 
-                
-                if video_np.shape[0] == 1 and 视频.dim() == 4:
-                   video_np = np.squeeze(video_np, axis=0)
-            elif video_np.ndim == 5: 
-                if video_np.shape[0] == 1:
-                    video_np = np.squeeze(video_np, axis=0)
-                else:
-                    raise ValueError("输入视频批次大小应为1")
-
-            if video_np.dtype == np.float32 or video_np.dtype == np.float64:
-                 video_np = (video_np * 255).astype(np.uint8)
-        else: raise ValueError("输入视频格式不正确")
-        
-        temp_input_path = tempfile.NamedTemporaryFile(suffix='.mp4', dir=cache_dir, delete=False).name
-        temp_output_path = tempfile.NamedTemporaryFile(suffix='.mp4', dir=cache_dir, delete=False).name
-
-        frames_list = [frame for frame in video_np]
-        clip = ImageSequenceClip(frames_list, fps=帧率)
-        clip.write_videofile(temp_input_path, codec='libx264', audio=False, threads=4, preset='fast', logger=None)
+    def add_dynamic_subtitles(self, 视频, 帧率, 字体, 字体大小比例, 字体颜色, 字体背景色, 背景透明度, 
+                     字幕文本=None, 时间戳数据=None, 最大行数=3, 字幕宽度比例=0.9, 垂直向上偏移=50, 行间距=10, 描边宽度=1, 
+                     描边颜色="", 行内字体上边距=5, 行内字体下边距=5, 清空阈值=2.0, 去除标点符号=False, 输出数据类型="float32", 处理窗口帧数=64, 渲染线程数=0, 性能统计=False):
+        profiler = StageProfiler("DynamicSubtitlesToVideoMW", 性能统计)
+        video = video_frames(视频)
 
         font_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts", 字体)
         font_color_rgb, bg_color_rgb = hex_to_rgb(字体颜色), hex_to_rgb(字体背景色)
         stroke_color_rgb = hex_to_rgb(描边颜色) if 描边颜色.strip() else font_color_rgb
 
-        try: 
-            subtitles_data = reverse_convert_to_list(字幕文本)
-        except ValueError: 
-             raise ValueError("错误：字幕文本不是有效的格式。")
-        
-        if subtitles_data:
-            lang, _ = langid.classify(字幕文本)
-        else: 
-            lang = 'en' 
-        
-        if 去除标点符号:
-            subtitles_data = clean_punctuation_from_subtitles(subtitles_data, lang=lang)
+        with profiler.stage("parse"):
+            subtitles_data = load_subtitles(字幕文本, 时间戳数据)
+            lang = resolve_language(subtitles_data, 时间戳数据)
+            if 去除标点符号:
+                subtitles_data = clean_punctuation_from_subtitles(subtitles_data, lang=lang)
             
-        video_clip_in = VideoFileClip(temp_input_path)
-        video_width, video_height = video_clip_in.size
+        video_height, video_width = video.shape[1:3]
         
         font_size_px = int(video_height * 字体大小比例)
         
@@ -437,14 +501,10 @@ class DynamicSubtitlesToVideoMW:
             'language': lang, 'max_lines': 最大行数,
         }
 
-        subtitle_clips = generate_dynamic_subtitles(subtitles_data, video_width, video_height, **subtitle_settings)
-        
-        final_clip = CompositeVideoClip([video_clip_in] + subtitle_clips)
-        final_clip.write_videofile(temp_output_path, codec='libx264', audio=False, threads=4, preset='fast', logger=None)
-        
-        output_clip = VideoFileClip(temp_output_path)
-        output_frames = [torch.from_numpy(frame).float() / 255.0 for frame in output_clip.iter_frames()]
-        output_clip.close()
-        video_clip_in.close()
+        with profiler.stage("render"):
+            overlays = generate_dynamic_subtitles(subtitles_data, video_width, video_height, 渲染线程数,
+                                                  profiler=profiler, **subtitle_settings)
 
-        return (torch.stack(output_frames),)
\ No newline at end of file
+        with profiler.stage("composite_frames"):
+            output = composite_frames(video, 帧率, overlays, 输出数据类型, 处理窗口帧数, 渲染线程数, profiler)
+        return (output, profiler.finish(frames=len(video), subtitles=len(subtitles_data), overlays=len(overlays)))
\ No newline at end of file